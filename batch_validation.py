@@ -0,0 +1,128 @@
+import weakref
+
+import numpy as np
+
+from sudoku_generator import CLASSIC
+
+DIGITS = np.arange(10, dtype=np.uint8)
+
+# Index tables of each Ruleset, built on first use. Weakly keyed, so the tables of per-request
+# killer rulesets are dropped with their ruleset instead of piling up in a long-lived process.
+rule_tables = weakref.WeakKeyDictionary()
+
+
+class RuleTables:
+    # The unit and cage tables of a Ruleset as numpy index arrays over flat cell indices
+    # (row * 9 + col). Units and cages shorter than the longest are padded with cell 81, an
+    # always empty cell appended to every grid, and cells in fewer units than the most are
+    # padded with an extra unit that never holds a digit.
+    def __init__(self, rules):
+        width = max(len(unit) for unit in rules.units)
+        self.unit_index = np.array([[row * 9 + col for row, col in unit] + [81] * (width - len(unit))
+                                    for unit in rules.units], dtype=np.intp)
+        cell_units = [units for row in rules.cell_units for units in row]
+        depth = max(len(units) for units in cell_units)
+        padding_unit = len(rules.units)
+        self.cell_unit_index = np.array([list(units) + [padding_unit] * (depth - len(units)) for units in cell_units],
+                                        dtype=np.intp)
+
+        self.cage_index = np.array([[row * 9 + col for row, col in cells] + [81] * (9 - len(cells))
+                                    for _, cells in rules.cages], dtype=np.intp).reshape(-1, 9)
+        self.cage_sizes = np.array([len(cells) for _, cells in rules.cages], dtype=np.intp)
+        self.cage_totals = np.array([total for total, _ in rules.cages], dtype=np.intp)
+        self.cell_cage = np.array([-1 if cage is None else cage for row in rules.cell_cage for cage in row],
+                                  dtype=np.intp)
+
+
+def tables_for(rules):
+    if rules not in rule_tables:
+        rule_tables[rules] = RuleTables(rules)
+    return rule_tables[rules]
+
+
+def as_grid_array(grids):
+    # Accepts an (N, 9, 9) array, a list of 9x9 lists or a list of SudokuPuzzle objects
+    if isinstance(grids, np.ndarray):
+        array = grids
+    else:
+        array = np.array([getattr(grid, "grid", grid) for grid in grids])
+    array = array.reshape(-1, 9, 9)
+    if array.size and (array.min() < 0 or array.max() > 9):
+        raise ValueError("Grid values must be between 0 and 9")
+    return array.astype(np.uint8, copy=False)
+
+
+def padded_cells(grids):
+    # (N, 82) flat grids with the always empty padding cell appended
+    array = as_grid_array(grids).reshape(-1, 81)
+    return np.concatenate([array, np.zeros((array.shape[0], 1), dtype=np.uint8)], axis=1)
+
+
+def unit_digit_counts(grids, rules=CLASSIC):
+    # (N, units, 10) array: how often each digit (0 = empty) appears in each unit of each grid
+    cells = padded_cells(grids)[:, tables_for(rules).unit_index]
+    return (cells[..., None] == DIGITS).sum(axis=2, dtype=np.uint8)
+
+
+def broken_cages(grids, rules=CLASSIC):
+    # (N, cages) boolean array of the killer cages over their total, or full with the wrong total
+    tables = tables_for(rules)
+    cells = padded_cells(grids)[:, tables.cage_index].astype(np.intp)
+    sums = cells.sum(axis=2)
+    full = (cells != 0).sum(axis=2) == tables.cage_sizes
+    return (sums > tables.cage_totals) | (full & (sums != tables.cage_totals))
+
+
+def valid_mask(grids, counts=None, rules=CLASSIC):
+    # Grids where no unit contains a digit twice (empty cells allowed) and no cage is broken
+    if counts is None:
+        counts = unit_digit_counts(grids, rules)
+    valid = ~(counts[:, :, 1:] > 1).any(axis=(1, 2))
+    if rules.cages:
+        valid &= ~broken_cages(grids, rules).any(axis=1)
+    return valid
+
+
+def solved_mask(grids, counts=None, rules=CLASSIC):
+    # Full grids that are valid, so every 9-cell unit contains 1 to 9 exactly once
+    filled = (as_grid_array(grids) != 0).all(axis=(1, 2))
+    return filled & valid_mask(grids, counts, rules)
+
+
+def conflict_mask(grids, counts=None, rules=CLASSIC):
+    # (N, 9, 9) boolean array of the filled cells whose digit repeats in one of their units
+    # or whose killer cage is broken
+    array = as_grid_array(grids).reshape(-1, 81)
+    tables = tables_for(rules)
+    if counts is None:
+        counts = unit_digit_counts(array, rules)
+    repeated = counts > 1
+    repeated[:, :, 0] = False  # Empty cells never conflict
+    repeated = np.concatenate([repeated, np.zeros_like(repeated[:, :1])], axis=1)  # The padding unit
+    # For every cell, whether its own digit is repeated in each of its units
+    units_of_cells = np.broadcast_to(tables.cell_unit_index, (array.shape[0],) + tables.cell_unit_index.shape)
+    digits = np.broadcast_to(array[:, :, None], units_of_cells.shape)
+    grid_index = np.arange(array.shape[0])[:, None, None]
+    conflicts = repeated[grid_index, units_of_cells, digits].any(axis=2)
+    if rules.cages:
+        broken = np.concatenate([broken_cages(array, rules), np.zeros((array.shape[0], 1), dtype=bool)], axis=1)
+        conflicts |= broken[:, tables.cell_cage] & (array != 0)
+    return conflicts.reshape(-1, 9, 9)
+
+
+def matches_givens(solutions, puzzles):
+    # Grids that keep every given of the puzzle they were solved from
+    solutions = as_grid_array(solutions)
+    puzzles = as_grid_array(puzzles)
+    return ((puzzles == 0) | (solutions == puzzles)).all(axis=(1, 2))
+
+
+def validate_batch(grids, rules=CLASSIC):
+    # Solved, valid and per-cell conflict masks of a batch of grids, sharing one count pass
+    array = as_grid_array(grids)
+    counts = unit_digit_counts(array, rules)
+    return {
+        "solved": solved_mask(array, counts, rules),
+        "valid": valid_mask(array, counts, rules),
+        "conflicts": conflict_mask(array, counts, rules),
+    }
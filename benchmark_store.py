@@ -0,0 +1,239 @@
+import os
+import json
+import math
+
+DEFAULT_STORE = "benchmark_results.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at TEXT NOT NULL,
+    git_commit TEXT,
+    git_dirty INTEGER,
+    machine TEXT NOT NULL,
+    corpus_id TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS samples (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    algorithm TEXT NOT NULL,
+    difficulty TEXT NOT NULL,
+    puzzle_index INTEGER NOT NULL,
+    wall_time REAL,
+    cpu_time REAL,
+    peak_memory INTEGER,
+    solved INTEGER NOT NULL,
+    timed_out INTEGER NOT NULL,
+    nodes INTEGER,
+    winner TEXT
+);
+CREATE INDEX IF NOT EXISTS samples_run ON samples(run_id, algorithm, difficulty);
+"""
+
+
+def open_store(path=DEFAULT_STORE):
+    import sqlite3
+    connection = sqlite3.connect(path)
+    connection.executescript(SCHEMA)
+    # Stores created before search nodes and portfolio winners were recorded
+    columns = [row[1] for row in connection.execute("PRAGMA table_info(samples)")]
+    for column, column_type in [("nodes", "INTEGER"), ("winner", "TEXT")]:
+        if column not in columns:
+            connection.execute(f"ALTER TABLE samples ADD COLUMN {column} {column_type}")
+    connection.commit()
+    return connection
+
+
+def git_revision():
+    # Commit hash of the working tree and whether it has uncommitted changes (None outside git)
+    import subprocess
+    directory = os.path.dirname(os.path.abspath(__file__))
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=directory, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        status = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=directory,
+                                capture_output=True, text=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    return commit, bool(status.strip())
+
+
+def machine_info():
+    import socket
+    import platform
+    return {
+        "hostname": socket.gethostname(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+    }
+
+
+def record_run(connection, corpus_id, samples):
+    # Store one benchmark run. Each sample is a dict with algorithm, difficulty, puzzle_index,
+    # wall_time, cpu_time, peak_memory, solved, timed_out and optionally nodes and winner (the
+    # engine that answered for the portfolio). Returns the new run id.
+    from datetime import datetime, timezone
+    commit, dirty = git_revision()
+    cursor = connection.execute(
+        "INSERT INTO runs (created_at, git_commit, git_dirty, machine, corpus_id) VALUES (?, ?, ?, ?, ?)",
+        (datetime.now(timezone.utc).isoformat(timespec="seconds"), commit, dirty,
+         json.dumps(machine_info(), sort_keys=True), corpus_id))
+    run_id = cursor.lastrowid
+    connection.executemany(
+        "INSERT INTO samples (run_id, algorithm, difficulty, puzzle_index, wall_time, cpu_time, peak_memory, "
+        "solved, timed_out, nodes, winner) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        [(run_id, sample["algorithm"], sample["difficulty"], sample["puzzle_index"], sample["wall_time"],
+          sample["cpu_time"], sample["peak_memory"], int(sample["solved"]), int(sample["timed_out"]),
+          sample.get("nodes"), sample.get("winner")) for sample in samples])
+    connection.commit()
+    return run_id
+
+
+def list_runs(connection, limit=20):
+    rows = connection.execute(
+        "SELECT runs.id, created_at, git_commit, git_dirty, machine, corpus_id, COUNT(samples.run_id) "
+        "FROM runs LEFT JOIN samples ON samples.run_id = runs.id GROUP BY runs.id ORDER BY runs.id DESC LIMIT ?",
+        (limit,)).fetchall()
+    return [{"id": row[0], "created_at": row[1], "git_commit": row[2], "git_dirty": bool(row[3]),
+             "machine": json.loads(row[4]), "corpus_id": row[5], "samples": row[6]} for row in rows]
+
+
+def get_run(connection, run_id):
+    row = connection.execute("SELECT id, corpus_id, machine FROM runs WHERE id = ?", (run_id,)).fetchone()
+    if row is None:
+        raise ValueError(f"No benchmark run with id {run_id}")
+    return {"id": row[0], "corpus_id": row[1], "machine": json.loads(row[2])}
+
+
+def latest_run_id(connection, corpus_id=None, before=None):
+    # Most recent run, optionally on the same corpus and older than another run
+    query = "SELECT id FROM runs WHERE 1 = 1"
+    params = []
+    if corpus_id is not None:
+        query += " AND corpus_id = ?"
+        params.append(corpus_id)
+    if before is not None:
+        query += " AND id < ?"
+        params.append(before)
+    row = connection.execute(query + " ORDER BY id DESC LIMIT 1", params).fetchone()
+    return row[0] if row else None
+
+
+def load_wall_times(connection, run_id):
+    # Wall time, timed_out and search nodes (or None) of every solve by (algorithm, difficulty)
+    # and puzzle index. A solve that timed out is kept, censored at its recorded wall time (when
+    # it was stopped at the time limit), so a solver that starts timing out counts as slower.
+    times = {}
+    for algorithm, difficulty, puzzle_index, wall_time, timed_out, nodes in connection.execute(
+            "SELECT algorithm, difficulty, puzzle_index, wall_time, timed_out, nodes FROM samples "
+            "WHERE run_id = ? AND wall_time IS NOT NULL", (run_id,)):
+        times.setdefault((algorithm, difficulty), {})[puzzle_index] = (wall_time, bool(timed_out), nodes)
+    return times
+
+
+def signed_ranks(differences):
+    # Twice the rank of each difference by absolute value (ties get their average rank, and
+    # doubling keeps the ranks integers), with zero differences dropped
+    nonzero = sorted((difference for difference in differences if difference != 0), key=abs)
+    ranks = []
+    i = 0
+    while i < len(nonzero):
+        j = i
+        while j + 1 < len(nonzero) and abs(nonzero[j + 1]) == abs(nonzero[i]):
+            j += 1
+        ranks += [(difference, i + j + 2) for difference in nonzero[i:j + 1]]
+        i = j + 1
+    return ranks
+
+
+def wilcoxon_greater(differences, exact_limit=25):
+    # One-sided Wilcoxon signed-rank test that the paired differences tend to be positive.
+    # Exact up to exact_limit nonzero differences, otherwise the normal approximation with tie
+    # and continuity correction; returns the p-value.
+    ranks = signed_ranks(differences)
+    if not ranks:
+        return 1.0
+    statistic = sum(rank for difference, rank in ranks if difference > 0)
+    total = sum(rank for _, rank in ranks)
+    if len(ranks) <= exact_limit:
+        # Number of sign assignments for every possible rank sum
+        counts = [1] + [0] * total
+        for _, rank in ranks:
+            for value in range(total, rank - 1, -1):
+                counts[value] += counts[value - rank]
+        return sum(counts[statistic:]) / 2 ** len(ranks)
+    variance = sum(rank * rank for _, rank in ranks) / 4
+    z = (statistic - total / 2 - 1) / math.sqrt(variance)  # Continuity correction of half a rank
+    return 0.5 * math.erfc(z / math.sqrt(2))
+
+
+def holm_adjust(p_values):
+    # Holm-Bonferroni adjusted p-values, controlling the family-wise error rate of all the tests
+    order = sorted(range(len(p_values)), key=lambda index: p_values[index])
+    adjusted = [1.0] * len(p_values)
+    running = 0.0
+    for position, index in enumerate(order):
+        running = max(running, min(1.0, (len(p_values) - position) * p_values[index]))
+        adjusted[index] = running
+    return adjusted
+
+
+def compare_runs(connection, baseline_id, candidate_id, alpha=0.05, min_slowdown=0.05, min_samples=6):
+    # Compare wall times per algorithm and difficulty on the puzzles both runs solved. A
+    # slowdown is flagged when the candidate's median is at least min_slowdown slower and the
+    # paired Wilcoxon signed-rank test is significant at alpha after Holm correction over all
+    # compared pairs. Pairs with fewer than min_samples puzzles get no test (p_value None).
+    # min_p_value is the smallest corrected p a pair could reach if every one of its puzzles
+    # had been slower; pairs where that is not below alpha are underpowered, as no result
+    # could flag them.
+    import statistics
+    baseline = load_wall_times(connection, baseline_id)
+    candidate = load_wall_times(connection, candidate_id)
+    rows = []
+    for key in sorted(set(baseline) & set(candidate)):
+        indices = sorted(set(baseline[key]) & set(candidate[key]))
+        pairs = [(baseline[key][index], candidate[key][index]) for index in indices]
+        baseline_times = [baseline_sample[0] for baseline_sample, _ in pairs]
+        candidate_times = [candidate_sample[0] for _, candidate_sample in pairs]
+        # Two solves stopped at the time limit are a tie
+        differences = [0 if baseline_sample[1] and candidate_sample[1] else candidate_sample[0] - baseline_sample[0]
+                       for baseline_sample, candidate_sample in pairs]
+        # Search nodes of the puzzles both runs recorded them for
+        node_pairs = [(baseline_sample[2], candidate_sample[2]) for baseline_sample, candidate_sample in pairs
+                      if baseline_sample[2] is not None and candidate_sample[2] is not None]
+        baseline_median = statistics.median(baseline_times) if pairs else 0
+        candidate_median = statistics.median(candidate_times) if pairs else 0
+        rows.append({
+            "algorithm": key[0],
+            "difficulty": key[1],
+            "samples": len(pairs),
+            "baseline_median": baseline_median,
+            "candidate_median": candidate_median,
+            "ratio": candidate_median / baseline_median if baseline_median > 0 else float("inf"),
+            "baseline_nodes": statistics.median(nodes for nodes, _ in node_pairs) if node_pairs else None,
+            "candidate_nodes": statistics.median(nodes for _, nodes in node_pairs) if node_pairs else None,
+            "raw_p_value": wilcoxon_greater(differences) if len(pairs) >= min_samples else None,
+            # The p-value of the same differences all turned into slowdowns
+            "raw_min_p_value": (wilcoxon_greater([abs(difference) for difference in differences])
+                                if len(pairs) >= min_samples else None),
+            "baseline_timeouts": sum(sample[1] for sample in baseline[key].values()),
+            "candidate_timeouts": sum(sample[1] for sample in candidate[key].values()),
+        })
+
+    tested = [row for row in rows if row["raw_p_value"] is not None]
+    for row, p_value in zip(tested, holm_adjust([row["raw_p_value"] for row in tested])):
+        row["p_value"] = p_value
+    # Holm-adjusted p-values never decrease when a raw p-value grows, so adjusting every
+    # pair's smallest raw p-value gives the smallest corrected p-value each could reach
+    for row, p_value in zip(tested, holm_adjust([row["raw_min_p_value"] for row in tested])):
+        row["min_p_value"] = p_value
+    for row in rows:
+        row.setdefault("p_value", None)
+        row.setdefault("min_p_value", None)
+        row["underpowered"] = row["min_p_value"] is not None and row["min_p_value"] >= alpha
+        row["regression"] = (row["p_value"] is not None and row["ratio"] >= 1 + min_slowdown
+                             and row["p_value"] < alpha)
+    return rows
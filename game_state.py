@@ -0,0 +1,126 @@
+from sudoku_generator import generate_sudoku, get_hint
+import solving_algorithms
+
+# Define difficulty levels
+DIFFICULTY_EASY = "Easy"
+DIFFICULTY_MEDIUM = "Medium"
+DIFFICULTY_HARD = "Hard"
+DIFFICULTIES = [DIFFICULTY_EASY, DIFFICULTY_MEDIUM, DIFFICULTY_HARD]
+
+# Solving algorithms offered to the player, keyed by their label in the solve dialog
+SOLVERS = {
+    "Backtracking": solving_algorithms.backtracking,
+    "Constraint Propagation": solving_algorithms.constraint_propagation,
+    "BFS Algorithm": solving_algorithms.solve_sudoku_bfs,
+    "DFS Algorithm": solving_algorithms.solve_sudoku_dfs,
+    "IDS Algorithm": solving_algorithms.solve_sudoku_ids,
+    "A* Search": solving_algorithms.solve_sudoku_astar,
+    "SAT Solver": solving_algorithms.solve_sudoku_sat,
+    "Portfolio Race": solving_algorithms.solve_sudoku_portfolio,
+    "Parallel Search": solving_algorithms.solve_sudoku_parallel,
+}
+
+
+class SudokuGame:
+    # Game state and player actions, independent of any display. The pygame view in sudoku.py
+    # drives an instance of this class, and replay.py drives one headless from a script.
+    def __init__(self, difficulty=DIFFICULTY_MEDIUM, puzzle=None):
+        self.difficulty = difficulty
+        self.puzzle = puzzle if puzzle is not None else generate_sudoku(difficulty)
+        if self.puzzle.solution is None:
+            # A puzzle from elsewhere: hints search until the solution is found
+            self.puzzle.solve_in_background()
+        self.selected_cell = None
+        self.selected_number = None
+        self.puzzle_solved = False
+        self.show_dialog = False
+
+    def new_puzzle(self, difficulty):
+        self.difficulty = difficulty
+        self.puzzle_solved = False
+        self.puzzle = generate_sudoku(difficulty)
+        self.reset_selection()
+
+    def reset_selection(self):
+        self.selected_cell = None
+        self.selected_number = None
+
+    def select_cell(self, row, col):
+        # Select a cell to type a number into
+        self.selected_cell = (row, col)
+        self.selected_number = None
+
+    def inspect_cell(self, row, col):
+        # Select a cell and show the number it currently holds
+        self.selected_cell = (row, col)
+        self.selected_number = self.puzzle.get_value(row, col)
+
+    def type_number(self, number):
+        # Stage a number (or None to clear it) for the selected cell; filled cells cannot be changed
+        if self.selected_cell is not None:
+            self.selected_number = number
+            if self.puzzle.get_value(self.selected_cell[0], self.selected_cell[1]) != 0:
+                self.selected_number = None
+
+    def enter_number(self):
+        # Write the staged number into the selected cell
+        if self.selected_cell is not None and self.selected_number is not None:
+            self.puzzle.set_value(self.selected_cell[0], self.selected_cell[1], self.selected_number)
+            self.reset_selection()
+
+    def is_entry_correct(self, row, col):
+        return self.puzzle.is_correct(row, col)
+
+    def hint(self):
+        hint_row, hint_col, hint_value = get_hint(self.puzzle)
+        if hint_row is not None:
+            self.puzzle.set_value(hint_row, hint_col, hint_value)
+        self.reset_selection()
+        return hint_row, hint_col, hint_value
+
+    def open_solver_dialog(self):
+        self.show_dialog = True
+
+    def close_dialog(self):
+        self.show_dialog = False
+
+    def solve(self, algorithm):
+        solved = SOLVERS[algorithm](self.puzzle)
+
+        # Iterate over each cell in the solved grid and update the puzzle's grid
+        if solved is not None:
+            for row in range(9):
+                for col in range(9):
+                    value = solved.get_value(row, col)
+                    self.puzzle.set_value(row, col, value)
+
+        self.show_dialog = False
+        return solved is not None
+
+    def check(self):
+        if self.puzzle.is_solved():
+            self.puzzle_solved = True
+        return self.puzzle_solved
+
+    def apply(self, action):
+        # Apply one scripted action, e.g. {"action": "select", "row": 0, "col": 4}
+        name = action["action"]
+        if name == "new_puzzle":
+            return self.new_puzzle(action.get("difficulty", self.difficulty))
+        if name == "select":
+            return self.select_cell(action["row"], action["col"])
+        if name == "inspect":
+            return self.inspect_cell(action["row"], action["col"])
+        if name == "type":
+            return self.type_number(action.get("number"))
+        if name == "enter":
+            return self.enter_number()
+        if name == "hint":
+            return self.hint()
+        if name == "check_entry":
+            return self.is_entry_correct(action["row"], action["col"])
+        if name == "solve":
+            return self.solve(action["algorithm"])
+        if name == "check":
+            return self.check()
+        raise ValueError(f"Unknown action: {name}")
@@ -0,0 +1,66 @@
+import sys
+import json
+import argparse
+import subprocess
+import statistics
+
+# Import-time budget in milliseconds for each module, measured in a fresh interpreter
+# (interpreter startup itself is excluded)
+IMPORT_BUDGETS_MS = {
+    "sudoku_generator": 20,
+    "solving_algorithms": 20,
+    "game_state": 25,
+    "replay": 30,
+    "performance_analysis": 30,
+}
+
+# Heavy third-party packages that must only be imported when a report is requested
+LAZY_DEPENDENCIES = ["numpy", "pandas", "matplotlib", "psutil", "pygame"]
+
+MEASURE_SNIPPET = """
+import sys, time, json
+start_time = time.perf_counter()
+import {module}
+elapsed_time = time.perf_counter() - start_time
+print(json.dumps({{"seconds": elapsed_time, "modules": sorted(sys.modules)}}))
+"""
+
+
+def measure_import(module):
+    # Import the module in a fresh interpreter and return the elapsed time and the loaded modules
+    output = subprocess.run([sys.executable, "-c", MEASURE_SNIPPET.format(module=module)],
+                            capture_output=True, text=True, check=True).stdout
+    result = json.loads(output)
+    return result["seconds"], set(result["modules"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check import times of the project modules against a budget")
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per module (median is reported)")
+    args = parser.parse_args()
+
+    failures = 0
+    print(f"{'Module':<24}{'Median (ms)':>12}{'Budget (ms)':>12}  Status")
+    for module, budget in IMPORT_BUDGETS_MS.items():
+        timings = []
+        loaded_modules = set()
+        for _ in range(args.runs):
+            seconds, loaded_modules = measure_import(module)
+            timings.append(seconds * 1000)
+        median_ms = statistics.median(timings)
+
+        heavy = [name for name in LAZY_DEPENDENCIES if name in loaded_modules]
+        status = "ok"
+        if median_ms > budget:
+            status = "OVER BUDGET"
+        if heavy:
+            status = f"eagerly imports {', '.join(heavy)}"
+        if status != "ok":
+            failures += 1
+        print(f"{module:<24}{median_ms:>12.2f}{budget:>12}  {status}")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,168 @@
+import os
+import time
+import signal
+
+from sudoku_generator import SudokuPuzzle
+
+
+def cpu_seconds():
+    # CPU time consumed by this process and its finished child processes, as reported by the OS
+    times = os.times()
+    return time.process_time() + times.children_user + times.children_system
+
+
+def timed_solve(solving_function, puzzle):
+    # Wall time from the monotonic high-resolution clock and CPU time from the OS
+    start_wall = time.perf_counter()
+    start_cpu = cpu_seconds()
+    solved = solving_function(puzzle)
+    cpu_time = cpu_seconds() - start_cpu
+    wall_time = time.perf_counter() - start_wall
+    return solved, wall_time, cpu_time
+
+
+def traced_solve(solving_function, puzzle):
+    # The timed solve, also recording the peak bytes Python allocated during it. tracemalloc
+    # slows the solve down, so memory tracking is opt-in and its timings are not comparable
+    # with untracked runs.
+    import tracemalloc
+
+    already_tracing = tracemalloc.is_tracing()
+    try:
+        if not already_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        children_before = children_cpu_seconds()
+        solved, wall_time, cpu_time = timed_solve(solving_function, puzzle)
+        peak_memory = None
+        if not ran_worker_processes(solved, children_before):
+            peak_memory = max(0, tracemalloc.get_traced_memory()[1] - baseline)
+    finally:
+        if not already_tracing:
+            tracemalloc.stop()
+    return solved, wall_time, cpu_time, peak_memory
+
+
+def children_cpu_seconds():
+    times = os.times()
+    return times.children_user + times.children_system
+
+
+def ran_worker_processes(solved, children_before):
+    # Allocations in worker processes (portfolio, parallel search) are invisible to tracemalloc,
+    # so no peak is reported for solves that ran any. Short-lived workers may not have used a
+    # whole clock tick of CPU, so the engines' own reports are checked as well.
+    solve_stats = getattr(solved, "solve_stats", None) or {}
+    return (children_cpu_seconds() != children_before or "workers" in solve_stats
+            or getattr(solved, "solved_by", None) is not None)
+
+
+def search_nodes(solved):
+    # Nodes the engine reports in its search statistics (SAT decisions for the SAT solver),
+    # or None for engines that keep none or found no solution
+    solve_stats = getattr(solved, "solve_stats", None) or {}
+    for name in ["nodes", "decisions"]:
+        if name in solve_stats:
+            return solve_stats[name]
+    return None
+
+
+def measure_in_process(solving_function, puzzle, track_memory=False):
+    # One solve; memory tracking instruments that solve instead of repeating it
+    peak_memory = None
+    if track_memory:
+        solved, wall_time, cpu_time, peak_memory = traced_solve(solving_function, puzzle)
+    else:
+        solved, wall_time, cpu_time = timed_solve(solving_function, puzzle)
+    return {
+        "solved": solved,
+        "wall_time": wall_time,
+        "cpu_time": cpu_time,
+        "peak_memory": peak_memory,
+        "nodes": search_nodes(solved),
+        "timed_out": False,
+    }
+
+
+def isolated_worker(solving_function, puzzle, track_memory, connection):
+    # Measures in a child process and sends back the metrics and the solved grid. The child
+    # leads its own process group, so a timeout also stops any workers the solver started.
+    new_process_group(os.getpid())
+    result = measure_in_process(solving_function, puzzle, track_memory)
+    solved = result.pop("solved")
+    if solved is not None:
+        result["grid"] = solved.grid
+        result["solve_stats"] = getattr(solved, "solve_stats", None)
+        result["solved_by"] = getattr(solved, "solved_by", None)
+    connection.send(result)
+    connection.close()
+
+
+def new_process_group(pid):
+    if hasattr(os, "setpgid"):
+        try:
+            os.setpgid(pid, pid)
+        except OSError:
+            pass  # The child already set it up, or has exited
+
+
+def kill_process_group(worker):
+    # SIGTERM would skip multiprocessing's cleanup and orphan the child's own worker processes
+    if hasattr(os, "killpg"):
+        try:
+            os.killpg(worker.pid, signal.SIGKILL)
+            return
+        except OSError:
+            pass
+    worker.terminate()
+
+
+def measure_isolated(solving_function, puzzle, track_memory=False, timeout=None):
+    import multiprocessing
+
+    parent_connection, child_connection = multiprocessing.Pipe(duplex=False)
+    # Not a daemon, so engines that start their own worker processes can run isolated too
+    worker = multiprocessing.Process(target=isolated_worker,
+                                     args=(solving_function, puzzle, track_memory, child_connection))
+    worker.start()
+    new_process_group(worker.pid)  # Set on both sides, so it holds whichever runs first
+    child_connection.close()
+
+    start_wall = time.perf_counter()
+    if parent_connection.poll(timeout):
+        try:
+            result = parent_connection.recv()
+        except EOFError:
+            # The worker died without reporting (e.g. killed for running out of memory)
+            result = {"wall_time": time.perf_counter() - start_wall, "cpu_time": None,
+                      "peak_memory": None, "nodes": None, "timed_out": False}
+    else:
+        # The solve ran past its time limit; stop it and every process it started instead of waiting
+        kill_process_group(worker)
+        result = {"wall_time": time.perf_counter() - start_wall, "cpu_time": None,
+                  "peak_memory": None, "nodes": None, "timed_out": True}
+    worker.join()
+    parent_connection.close()
+
+    solved = None
+    if "grid" in result:
+        solved = SudokuPuzzle(result.pop("grid"), puzzle.rules)
+        solved.difficulty = puzzle.difficulty
+        for name in ["solve_stats", "solved_by"]:
+            value = result.pop(name)
+            if value is not None:
+                setattr(solved, name, value)
+    result["solved"] = solved
+    return result
+
+
+def measure_solve(solving_function, puzzle, track_memory=False, isolate=False, timeout=None):
+    # Measure one solve. Returns a dict with the solved puzzle (or None), wall_time and
+    # cpu_time in seconds, peak_memory in bytes allocated during the solve (None when not
+    # tracked), search nodes the engine reports (or None) and timed_out. With isolate the
+    # solve runs in a fresh process, which keeps one solve's heap from affecting the next
+    # and allows a timeout.
+    if isolate:
+        return measure_isolated(solving_function, puzzle, track_memory, timeout)
+    return measure_in_process(solving_function, puzzle, track_memory)
@@ -0,0 +1,179 @@
+import os
+import queue
+import multiprocessing
+
+from search_core import make_search_core, FEWEST_CANDIDATES
+
+# Initial subtrees per worker; more subtrees balance better but cost more splitting up front
+TASKS_PER_WORKER = 4
+
+# Nodes a worker searches between checks for cancellation and idle workers
+CHECK_INTERVAL = 1024
+
+
+def digits_of(mask):
+    return [digit for digit in range(1, 10) if mask & (1 << digit)]
+
+
+def core_for(grid, rules, prefix):
+    # Search core for the subtree below a prefix of (cell, value) assignments
+    cells = [value for row in grid for value in row]
+    for cell, value in prefix:
+        cells[cell] = value
+    return make_search_core([cells[row * 9:row * 9 + 9] for row in range(9)], FEWEST_CANDIDATES, rules)
+
+
+def split_tasks(grid, rules, task_count):
+    # Expand the top of the search tree level by level, one task per candidate of the most
+    # constrained cell, until there are at least task_count subtrees. Dead ends are dropped.
+    tasks = [[]]
+    while len(tasks) < task_count:
+        expanded = []
+        for prefix in tasks:
+            core = core_for(grid, rules, prefix)
+            if not core.consistent:
+                continue
+            cell, candidates = core.select_cell()
+            if cell is None:
+                expanded.append(prefix)  # Already solved
+            else:
+                expanded.extend(prefix + [(cell, digit)] for digit in digits_of(candidates))
+        if expanded == tasks:
+            break  # Every task is a solved grid
+        tasks = expanded
+        if not tasks:
+            break
+    return tasks
+
+
+def donate(core, prefix, tasks, created, queued):
+    # Hand the untried candidates of the shallowest open trail entry to idle workers as new
+    # tasks. The shallowest entry holds the largest remaining subtrees.
+    for depth, (cell, remaining) in enumerate(core.trail):
+        if remaining:
+            path = prefix + [(trail_cell, core.cells[trail_cell]) for trail_cell, _ in core.trail[:depth]]
+            new_tasks = [path + [(cell, digit)] for digit in digits_of(remaining)]
+            core.trail[depth][1] = 0
+            # Count the tasks before queueing them, so the parent never sees all work done early
+            with created.get_lock():
+                created.value += len(new_tasks)
+            with queued.get_lock():
+                queued.value += len(new_tasks)
+            for task in new_tasks:
+                tasks.put(task)
+            return len(new_tasks)
+    return 0
+
+
+def search_worker(grid, rules, count_all, limit, tasks, messages, stop, idle, created, queued, found):
+    # Searches subtrees from the task queue until stopped. Reports ("solution", cells) for
+    # the first solution and ("done", nodes, donated) after every task. When counting,
+    # solutions are added to the shared found counter and all workers stop at limit.
+    # Work is only donated while workers are idle and no earlier task is still queued for
+    # them, since idle workers poll the queue only every 50 ms.
+    tasks.cancel_join_thread()
+    while not stop.is_set():
+        with idle.get_lock():
+            idle.value += 1
+        try:
+            prefix = tasks.get(timeout=0.05)
+        except queue.Empty:
+            continue
+        finally:
+            with idle.get_lock():
+                idle.value -= 1
+        with queued.get_lock():
+            queued.value -= 1
+
+        core = core_for(grid, rules, prefix)
+        donated = [0]
+
+        def check():
+            if stop.is_set():
+                return True
+            if idle.value > 0 and queued.value == 0:
+                donated[0] += donate(core, prefix, tasks, created, queued)
+            return False
+
+        for solution in core.solutions(callback=check, interval=CHECK_INTERVAL):
+            with found.get_lock():
+                found.value += 1
+                reached_limit = limit is not None and found.value >= limit
+            if not count_all:
+                messages.put(("solution", solution))
+            if not count_all or reached_limit:
+                stop.set()
+                break
+        messages.put(("done", core.nodes, donated[0]))
+
+
+def parallel_search(grid, rules, workers=None, count_all=False, limit=None):
+    # Search one puzzle with worker processes. The top of the tree is split into subtrees on
+    # a shared queue, and busy workers give part of their subtree to idle ones. Returns the
+    # first solution found (flat list of 81 values, or None), the number of solutions
+    # (every one when count_all, stopping at limit) and search statistics.
+    workers = workers or os.cpu_count() or 1
+    initial_tasks = split_tasks(grid, rules, workers * TASKS_PER_WORKER)
+
+    tasks = multiprocessing.Queue()
+    messages = multiprocessing.Queue()
+    stop = multiprocessing.Event()
+    idle = multiprocessing.Value("i", 0)
+    created = multiprocessing.Value("i", len(initial_tasks))
+    queued = multiprocessing.Value("i", len(initial_tasks))  # Tasks put on the queue and not yet taken
+    found = multiprocessing.Value("q", 0)
+    for task in initial_tasks:
+        tasks.put(task)
+
+    worker_args = (grid, rules, count_all, limit, tasks, messages, stop, idle, created, queued, found)
+    processes = [multiprocessing.Process(target=search_worker, args=worker_args, daemon=True)
+                 for _ in range(workers)]
+    for process in processes:
+        process.start()
+
+    solution, nodes, donated, finished = None, 0, 0, 0
+
+    def record(message):
+        nonlocal solution, nodes, donated, finished
+        if message[0] == "solution":
+            solution = solution or message[1]
+        else:
+            finished += 1
+            nodes += message[1]
+            donated += message[2]
+
+    try:
+        # Done when a worker stopped the search or every task created so far has finished
+        while not stop.is_set():
+            with created.get_lock():
+                if finished == created.value:
+                    break
+            try:
+                record(messages.get(timeout=0.1))
+            except queue.Empty:
+                if not any(process.is_alive() for process in processes):
+                    raise RuntimeError("Search workers exited before finishing")
+    finally:
+        # Cancel every worker that is still searching, then collect their last reports
+        stop.set()
+        for process in processes:
+            process.join(timeout=1)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        while True:
+            try:
+                record(messages.get(timeout=0.01))
+            except queue.Empty:
+                break
+        tasks.cancel_join_thread()
+        messages.cancel_join_thread()
+
+    count = found.value if limit is None else min(found.value, limit)
+    stats = {
+        "nodes": nodes,
+        "tasks": len(initial_tasks),
+        "donated_tasks": donated,
+        "workers": workers,
+    }
+    return solution, count, stats
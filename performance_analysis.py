@@ -1,13 +1,24 @@
-import time
+import os
+import sys
+import random
+import argparse
 import sudoku_generator
-from solving_algorithms import backtracking, constraint_propagation, solve_sudoku_dfs, solve_sudoku_bfs, solve_sudoku_ids, solve_sudoku_astar
-import psutil
-import pandas as pd
-import matplotlib.pyplot as plt
+import benchmark_store
+from collections import Counter
+from measurement import measure_solve
+from variants import VARIANTS, rules_by_name
+from solving_algorithms import backtracking, constraint_propagation, solve_sudoku_dfs, solve_sudoku_bfs, solve_sudoku_ids, solve_sudoku_astar, solve_sudoku_sat, solve_sudoku_portfolio, solve_sudoku_parallel
 
 # Number of puzzles to generate and solve
 num_puzzles = 10
 
+# Measure peak allocated memory with tracemalloc during every solve, which slows the solves down
+track_memory = False
+
+# Run every solve in a fresh process, optionally stopping it after solve_timeout seconds
+isolate_solves = False
+solve_timeout = None
+
 # List of solver functions
 solver_functions = [
     backtracking,
@@ -15,63 +26,144 @@ solver_functions = [
     solve_sudoku_dfs,
     solve_sudoku_bfs,
     solve_sudoku_ids,
-    solve_sudoku_astar
+    solve_sudoku_astar,
+    solve_sudoku_sat,
+    solve_sudoku_portfolio,
+    solve_sudoku_parallel
 ]
 
-def analyze_algorithms(solving_function, difficulty):
+def generate_corpus(seed, difficulty, rules=sudoku_generator.CLASSIC):
+    # The same seed always produces the same puzzles, so runs on one corpus are comparable
+    random.seed(f"{seed}-{difficulty}")
+    return [sudoku_generator.generate_sudoku(difficulty, rules) for _ in range(num_puzzles)]
+
+def corpus_hash(puzzles):
+    # Short hash of the puzzles' givens, so a generator change that alters the puzzles of a
+    # seed also changes the corpus id
+    import hashlib
+    digest = hashlib.sha1()
+    for puzzle in puzzles:
+        digest.update(bytes(value for row in puzzle.initial_puzzle for value in row))
+    return digest.hexdigest()[:8]
+
+def corpus_id(seed, puzzles, variants=()):
+    corpus = f"seed={seed},puzzles={num_puzzles}"
+    if variants:
+        corpus += ",variants=" + "+".join(variants)
+    return corpus + ",hash=" + corpus_hash(puzzles)
+
+def check_solutions(puzzles, solutions):
+    # Validate all solutions in one vectorized pass. A solution is correct when it is a full
+    # valid grid that keeps the givens of its puzzle; None (no solution) is never correct.
+    # The puzzles share one ruleset.
+    from batch_validation import solved_mask, matches_givens
+    if not puzzles:
+        return []
+    givens = [puzzle.initial_puzzle for puzzle in puzzles]
+    grids = [solved.grid if solved is not None else grid for solved, grid in zip(solutions, givens)]
+    correct = solved_mask(grids, rules=puzzles[0].rules) & matches_givens(grids, givens)
+    return [bool(is_correct) and solved is not None for is_correct, solved in zip(correct, solutions)]
+
+def analyze_algorithms(solving_function, difficulty, puzzles=None):
         total_time = 0
-        total_mem = 0
+        memory_samples = []
         total_cpu = 0
+        total_cpu_time = 0
         total_correct = 0
+        timeouts = 0
+        search_stats = {}
+        winners = Counter()
+        samples = []
+        solved_puzzles = []
+        solutions = []
+
+        for puzzle_index in range(num_puzzles):
+            # Solve a copy so every solver starts from the same corpus puzzle
+            if puzzles is not None:
+                puzzle = puzzles[puzzle_index].copy()
+            else:
+                puzzle = sudoku_generator.generate_sudoku(difficulty)
+            measurement = measure_solve(solving_function, puzzle, track_memory, isolate_solves, solve_timeout)
+            solved = measurement["solved"]
+            timeouts += measurement["timed_out"]
+            solved_puzzles.append(puzzle)
+            solutions.append(solved)
+
+            samples.append({
+                "algorithm": solving_function.__name__,
+                "difficulty": difficulty,
+                "puzzle_index": puzzle_index,
+                "wall_time": measurement["wall_time"],
+                "cpu_time": measurement["cpu_time"],
+                "peak_memory": measurement["peak_memory"],
+                "nodes": measurement["nodes"],
+                "winner": getattr(solved, "solved_by", None),
+                "timed_out": measurement["timed_out"],
+            })
+
+            # Engines that report search statistics (e.g. SAT conflicts and learned clauses)
+            for name, value in getattr(solved, "solve_stats", {}).items():
+                search_stats[name] = search_stats.get(name, 0) + value
+
+            # The portfolio records which engine produced its answer
+            if getattr(solved, "solved_by", None) is not None:
+                winners[solved.solved_by] += 1
+
+            elapsed_time = measurement["wall_time"]
+            total_time += elapsed_time
 
-        for _ in range(num_puzzles):
-            process = psutil.Process()
-            puzzle = sudoku_generator.generate_sudoku(difficulty)
-            start_time = time.time()
-            solved = solving_function(puzzle)
-            end_time = time.time()
+            # CPU usage is the share of wall time spent on a CPU (above 100% when workers run in parallel)
+            cpu_time = measurement["cpu_time"] or 0
+            total_cpu_time += cpu_time
+            total_cpu += cpu_time / elapsed_time * 100 if elapsed_time > 0 else 0
+            if measurement["peak_memory"] is not None:
+                memory_samples.append(measurement["peak_memory"] / 1024 / 1024)  # in MB
 
-            is_solution_correct = solved.is_solved()
+        for sample, is_solution_correct in zip(samples, check_solutions(solved_puzzles, solutions)):
+            sample["solved"] = is_solution_correct
             total_correct += is_solution_correct
 
-            elapsed_time = end_time - start_time
-            total_time += elapsed_time
-
-            cpu_usage = process.cpu_percent(interval=elapsed_time)
-            total_mem += process.memory_info().rss / 1024 / 1024  # in MB
-            total_cpu += cpu_usage
-
         avg_cpu = total_cpu / num_puzzles
-        avg_mem = total_mem / num_puzzles
+        # None when memory was not tracked or the solver allocates in worker processes
+        avg_mem = sum(memory_samples) / len(memory_samples) if memory_samples else None
         avg_time = total_time / num_puzzles
         accuracy = (total_correct / num_puzzles) * 100
 
         print(f"Algorithm: {solving_function.__name__}")
         print(f"Average Time: {avg_time:.6f} seconds")
-        print(f"CPU Usage: {avg_cpu}%")
-        print(f"Memory Usage: {avg_mem:.2f} MB")
+        print(f"Average CPU Time: {total_cpu_time / num_puzzles:.6f} seconds")
+        print(f"CPU Usage: {avg_cpu:.1f}%")
+        if avg_mem is not None:
+            print(f"Peak Memory: {avg_mem:.2f} MB")
         print(f"Accuracy: {accuracy:.2f}%")
+        if timeouts:
+            print(f"Timed out: {timeouts} of {num_puzzles}")
+        for name, total in search_stats.items():
+            print(f"Average {name.replace('_', ' ')}: {total / num_puzzles:.1f}")
+        for engine, wins in winners.most_common():
+            print(f"{engine} won {wins} of {num_puzzles}")
         print("-----------------------------")
 
         return {
             "algorithm": solving_function.__name__,
             "average_cpu": avg_cpu,
+            "average_cpu_time": total_cpu_time / num_puzzles,
             "average_mem": avg_mem,
             "avg_time": avg_time,
             "accuracy": accuracy,
-            "difficulty": difficulty
+            "timeouts": timeouts,
+            "difficulty": difficulty,
+            "search_stats": {name: total / num_puzzles for name, total in search_stats.items()},
+            "winners": dict(winners),
+            "samples": samples
         }
         
 def analyze_algorithm_speed(solving_function, difficulty):
     total_time = 0
     for _ in range(num_puzzles):
         puzzle = sudoku_generator.generate_sudoku(difficulty)
-        start_time = time.time()
-        solving_function(puzzle)
-        end_time = time.time()
-
-        elapsed_time = end_time - start_time
-        total_time += elapsed_time
+        measurement = measure_solve(solving_function, puzzle, track_memory=False)
+        total_time += measurement["wall_time"]
 
     avg_time = total_time / num_puzzles
 
@@ -89,23 +181,20 @@ def analyze_algorithm_performance(solving_function, difficulty):
     total_cpu = 0
     for _ in range(num_puzzles):
         puzzle = sudoku_generator.generate_sudoku(difficulty)
-        process = psutil.Process()
-        start_time = time.time()
-        solving_function(puzzle)
-        end_time = time.time()
+        measurement = measure_solve(solving_function, puzzle, track_memory=True)
 
-        elapsed_time = end_time - start_time
-        cpu_usage = process.cpu_percent(interval=elapsed_time)
+        elapsed_time = measurement["wall_time"]
+        cpu_usage = measurement["cpu_time"] / elapsed_time * 100 if elapsed_time > 0 else 0
 
-        total_mem += process.memory_info().rss / 1024 / 1024  # in MB
+        total_mem += (measurement["peak_memory"] or 0) / 1024 / 1024  # in MB
         total_cpu += cpu_usage
     
     avg_cpu = total_cpu / num_puzzles
     avg_mem = total_mem / num_puzzles
 
     print(f"Algorithm: {solving_function.__name__}")
-    print(f"{solving_function.__name__} CPU Usage: {avg_cpu}%")
-    print(f"{solving_function.__name__} Memory Usage: {avg_mem:.2f} MB")
+    print(f"{solving_function.__name__} CPU Usage: {avg_cpu:.1f}%")
+    print(f"{solving_function.__name__} Peak Memory: {avg_mem:.2f} MB")
     print("-----------------------------")
 
     return {
@@ -115,15 +204,13 @@ def analyze_algorithm_performance(solving_function, difficulty):
     }
 
 def analyze_algorithmn_accuracy(solving_function, difficulty):
-    total_correct = 0
+    puzzles = []
+    solutions = []
     for _ in range(num_puzzles):
         puzzle = sudoku_generator.generate_sudoku(difficulty)
-        start_time = time.time()
-        solving_function(puzzle)
-        end_time = time.time()
-
-        is_solution_correct = puzzle.is_solved()
-        total_correct += is_solution_correct
+        puzzles.append(puzzle)
+        solutions.append(solving_function(puzzle))
+    total_correct = sum(check_solutions(puzzles, solutions))
 
     accuracy = (total_correct / num_puzzles) * 100
 
@@ -137,7 +224,13 @@ def analyze_algorithmn_accuracy(solving_function, difficulty):
     }
 
 
-def generate_visualizations(data, difficulty):
+def generate_visualizations(data, difficulty, output_dir="charts", show=False):
+    # Charts are rendered to PNG files with the non-interactive Agg backend unless show is set
+    import matplotlib
+    if not show:
+        matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
     # Create subplots
     fig, axs = plt.subplots(2, 2, figsize=(12, 8))
 
@@ -150,8 +243,11 @@ def generate_visualizations(data, difficulty):
 
     # Plot average memory consumption
     axs[0, 1].bar([entry["algorithm"] for entry in data], [
-                  entry["average_mem"] for entry in data])
-    axs[0, 1].set_title(f"Average Memory Consumption ({difficulty})")
+                  entry["average_mem"] or 0 for entry in data])
+    if all(entry["average_mem"] is None for entry in data):
+        axs[0, 1].set_title(f"Peak Allocated Memory not measured ({difficulty}, use --memory)")
+    else:
+        axs[0, 1].set_title(f"Average Peak Allocated Memory ({difficulty})")
     axs[0, 1].set_ylabel("Memory (MB)")
     axs[0, 1].tick_params(axis='x', rotation=40)
     # axs[0, 1].set_ylim(80, 90)
@@ -173,30 +269,304 @@ def generate_visualizations(data, difficulty):
     # Adjust layout
     plt.tight_layout()
 
-    # Show plots
-    plt.show()
+    # Save the charts, and show them only when asked to
+    os.makedirs(output_dir, exist_ok=True)
+    chart_path = os.path.join(output_dir, f"performance_{difficulty.lower()}.png")
+    fig.savefig(chart_path)
+    print(f"Saved chart: {chart_path}")
+    if show:
+        plt.show()
+    plt.close(fig)
+    return chart_path
+
+def run_benchmarks(args):
+    global num_puzzles, track_memory, isolate_solves, solve_timeout
+    num_puzzles = args.puzzles
+    track_memory = args.memory
+    isolate_solves = args.isolate
+    solve_timeout = args.timeout
 
-def main():
     # Run performance analysis and add results for each algorithm to list.
-    easy_performance_results = []
-    for solving_function in solver_functions:
-        easy_results = analyze_algorithms(solving_function, "Easy")
-        easy_performance_results.append(easy_results)
-    generate_visualizations(easy_performance_results, "Easy")
+    rules = rules_by_name(args.variants)
+    samples = []
+    corpus = []
+    for difficulty in args.difficulties:
+        puzzles = generate_corpus(args.seed, difficulty, rules)
+        corpus += puzzles
+        performance_results = []
+        for solving_function in solver_functions:
+            if args.algorithms and solving_function.__name__ not in args.algorithms:
+                continue
+            results = analyze_algorithms(solving_function, difficulty, puzzles)
+            performance_results.append(results)
+            samples += results["samples"]
+        if not args.no_charts:
+            generate_visualizations(performance_results, difficulty, args.output_dir, args.show)
+
+    if not args.no_store:
+        connection = benchmark_store.open_store(args.store)
+        run_id = benchmark_store.record_run(connection, corpus_id(args.seed, corpus, args.variants), samples)
+        print(f"Recorded run {run_id} in {args.store}")
+        connection.close()
+    return 0
+
+def run_profiles(args):
+    # Profile every solver on every difficulty instead of benchmarking it
+    from profiling import profile_solver
+    global num_puzzles
+    num_puzzles = args.puzzles
+
+    rules = rules_by_name(args.variants)
+    for difficulty in args.difficulties:
+        puzzles = generate_corpus(args.seed, difficulty, rules)
+        for solving_function in solver_functions:
+            if args.algorithms and solving_function.__name__ not in args.algorithms:
+                continue
+            profile_solver(solving_function, puzzles, difficulty, args.profile_dir, args.profile_mode,
+                           args.top, args.sample_interval / 1000)
+    return 0
+
+def confidence_band(values):
+    # Mean and half-width of the 95% confidence interval of the mean (normal approximation)
+    mean = sum(values) / len(values)
+    if len(values) < 2:
+        return mean, 0.0
+    variance = sum((value - mean) ** 2 for value in values) / (len(values) - 1)
+    return mean, 1.96 * (variance / len(values)) ** 0.5
+
+def generate_sweep_visualizations(results, timeout, output_dir="charts", show=False):
+    # Time, nodes and memory against the number of givens with 95% confidence bands
+    import matplotlib
+    if not show:
+        matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    fig, axs = plt.subplots(3, 1, figsize=(12, 14), sharex=True)
+    metrics = [("wall_time", "Solving Time (s)", 1), ("nodes", "Search Nodes", 1),
+               ("peak_memory", "Peak Allocated Memory (MB)", 1024 * 1024)]
+    for algorithm, by_clues in results.items():
+        for ax, (metric, label, scale) in zip(axs, metrics):
+            clues, means, lows, highs = [], [], [], []
+            for clue_count in sorted(by_clues):
+                # Timed-out solves count as the timeout for time and are left out of the other metrics
+                if metric == "wall_time":
+                    values = [timeout if sample["timed_out"] else sample["wall_time"] for sample in by_clues[clue_count]]
+                else:
+                    values = [sample[metric] / scale for sample in by_clues[clue_count] if sample[metric] is not None]
+                if not values:
+                    continue
+                mean, half_width = confidence_band(values)
+                clues.append(clue_count)
+                means.append(mean)
+                lows.append(max(mean - half_width, 0))
+                highs.append(mean + half_width)
+            line, = ax.plot(clues, means, label=algorithm)
+            ax.fill_between(clues, lows, highs, color=line.get_color(), alpha=0.2)
+
+    for ax, (metric, label, _) in zip(axs, metrics):
+        ax.set_ylabel(label)
+        if metric == "wall_time":
+            ax.set_yscale("log")
+        elif metric == "nodes":
+            ax.set_yscale("symlog", linthresh=1)  # Fully given grids need no nodes
+        ax.grid(True, alpha=0.3)
+    axs[0].axhline(timeout, color="gray", linestyle="--", linewidth=1)
+    axs[0].set_title("Solver Scaling by Number of Givens (95% confidence bands, dashed line = timeout)")
+    axs[0].legend(loc="upper left", fontsize="small")
+    axs[-1].set_xlabel("Givens")
+    axs[-1].invert_xaxis()
+    plt.tight_layout()
 
-    medium_performance_results = []
-    for solving_function in solver_functions:
-        medium_results = analyze_algorithms(solving_function, "Medium")
-        medium_performance_results.append(medium_results)
-    generate_visualizations(medium_performance_results, "Medium")
-    
-    hard_performance_results = []
+    os.makedirs(output_dir, exist_ok=True)
+    chart_path = os.path.join(output_dir, "clue_sweep.png")
+    fig.savefig(chart_path)
+    print(f"Saved chart: {chart_path}")
+    if show:
+        plt.show()
+    plt.close(fig)
+    return chart_path
+
+def run_sweep(args):
+    # Solve puzzles at every number of givens, from full grids down to the fewest givens the
+    # generator reached with a unique solution, and chart how each solver scales
+    timeout = args.timeout if args.timeout is not None else 10.0
+    chains = []
+    for chain in range(args.chains):
+        random.seed(f"{args.seed}-sweep-{chain}")
+        chains.append(sudoku_generator.generate_clue_sweep())
+    clue_counts = sorted({clues for chain in chains for clues in chain}, reverse=True)[::args.clue_step]
+    print(f"Sweeping {len(clue_counts)} clue counts from {clue_counts[0]} to {clue_counts[-1]} "
+          f"over {args.chains} puzzle chains")
+
+    results = {}
+    samples = []
     for solving_function in solver_functions:
-        hard_results = analyze_algorithms(solving_function, "Hard")
-        hard_performance_results.append(hard_results)
-    generate_visualizations(hard_performance_results, "Hard")
-    
-    exit
+        if args.algorithms and solving_function.__name__ not in args.algorithms:
+            continue
+        by_clues = {}
+        peak_clues, peak_time = None, 0
+        for clue_count in clue_counts:
+            measurements = []
+            puzzles = []
+            clue_samples = []
+            for chain_index, chain in enumerate(chains):
+                if clue_count not in chain:
+                    continue
+                measurement = measure_solve(solving_function, chain[clue_count].copy(), args.memory,
+                                            isolate=True, timeout=timeout)
+                measurements.append(measurement)
+                puzzles.append(chain[clue_count])
+                clue_samples.append({
+                    "algorithm": solving_function.__name__,
+                    "difficulty": f"clues={clue_count}",
+                    "puzzle_index": chain_index,
+                    "wall_time": measurement["wall_time"],
+                    "cpu_time": measurement["cpu_time"],
+                    "peak_memory": measurement["peak_memory"],
+                    "nodes": measurement["nodes"],
+                    "timed_out": measurement["timed_out"],
+                })
+            correct = check_solutions(puzzles, [measurement["solved"] for measurement in measurements])
+            for sample, is_solution_correct in zip(clue_samples, correct):
+                sample["solved"] = is_solution_correct
+            samples.extend(clue_samples)
+            by_clues[clue_count] = measurements
+
+            mean_time = sum(timeout if m["timed_out"] else m["wall_time"] for m in measurements) / len(measurements)
+            if mean_time > peak_time:
+                peak_clues, peak_time = clue_count, mean_time
+            # Once every puzzle at a clue count times out, fewer givens will not finish either
+            if all(m["timed_out"] for m in measurements):
+                print(f"{solving_function.__name__}: every solve timed out at {clue_count} givens, "
+                      f"skipping fewer givens")
+                break
+        results[solving_function.__name__] = by_clues
+        print(f"{solving_function.__name__}: slowest at {peak_clues} givens ({peak_time:.4f} s mean)")
+
+    if not args.no_charts:
+        generate_sweep_visualizations(results, timeout, args.output_dir, args.show)
+    if not args.no_store:
+        connection = benchmark_store.open_store(args.store)
+        puzzles = [chain[clue_count] for clue_count in clue_counts for chain in chains if clue_count in chain]
+        corpus = f"sweep:seed={args.seed},chains={args.chains},step={args.clue_step},hash={corpus_hash(puzzles)}"
+        run_id = benchmark_store.record_run(connection, corpus, samples)
+        print(f"Recorded run {run_id} in {args.store}")
+        connection.close()
+    return 0
+
+def compare(args):
+    # Flag statistically significant slowdowns of a candidate run against a baseline run
+    connection = benchmark_store.open_store(args.store)
+    candidate_id = args.candidate or benchmark_store.latest_run_id(connection)
+    if candidate_id is None:
+        print("No benchmark runs recorded yet")
+        return 1
+    candidate = benchmark_store.get_run(connection, candidate_id)
+    baseline_id = args.baseline or benchmark_store.latest_run_id(connection, candidate["corpus_id"], candidate_id)
+    if baseline_id is None:
+        print(f"No earlier run on corpus {candidate['corpus_id']} to compare run {candidate_id} with")
+        return 1
+    baseline = benchmark_store.get_run(connection, baseline_id)
+    if baseline["corpus_id"] != candidate["corpus_id"]:
+        print(f"Warning: comparing different corpora ({baseline['corpus_id']} vs {candidate['corpus_id']})")
+    if baseline["machine"] != candidate["machine"]:
+        print("Warning: runs were recorded on different machines")
+
+    rows = benchmark_store.compare_runs(connection, baseline_id, candidate_id, args.alpha, args.min_slowdown,
+                                        args.min_samples)
+    connection.close()
+
+    print(f"Baseline run {baseline_id} vs candidate run {candidate_id} "
+          f"(paired Wilcoxon signed-rank test, Holm-corrected p)")
+    print(f"{'Algorithm':<28}{'Difficulty':<12}{'Baseline (s)':>14}{'Candidate (s)':>15}{'Ratio':>8}{'p':>9}"
+          f"{'Timeouts':>10}{'Nodes':>8}")
+    regressions = 0
+    for row in rows:
+        if row["p_value"] is None:
+            p_value, flag = f"{'-':>9}", f"  too few samples ({row['samples']})"
+        elif row["underpowered"]:
+            # No outcome on these puzzles could be significant, so the test says nothing
+            p_value, flag = f"{row['p_value']:>9.4f}", f"  underpowered (p >= {row['min_p_value']:.4f})"
+        else:
+            p_value, flag = f"{row['p_value']:>9.4f}", "  SLOWER" if row["regression"] else ""
+        regressions += row["regression"]
+        # Ratio of the median search nodes, which separates algorithmic changes from noise
+        if row["baseline_nodes"] and row["candidate_nodes"] is not None:
+            nodes = f"{row['candidate_nodes'] / row['baseline_nodes']:>8.2f}"
+        else:
+            nodes = f"{'-':>8}"
+        print(f"{row['algorithm']:<28}{row['difficulty']:<12}{row['baseline_median']:>14.6f}"
+              f"{row['candidate_median']:>15.6f}{row['ratio']:>8.2f}{p_value}"
+              f"{row['baseline_timeouts']:>5} ->{row['candidate_timeouts']:>2}{nodes}{flag}")
+    print(f"{regressions} significant slowdown(s)")
+    underpowered = sum(row["underpowered"] for row in rows)
+    if underpowered:
+        print(f"{underpowered} pair(s) could not reach p < {args.alpha} with these samples; "
+              f"record runs with more --puzzles")
+    return 1 if regressions else 0
+
+def history(args):
+    connection = benchmark_store.open_store(args.store)
+    for run in benchmark_store.list_runs(connection):
+        commit = (run["git_commit"] or "unknown")[:10] + ("+" if run["git_dirty"] else "")
+        print(f"{run['id']:>5}  {run['created_at']}  {commit:<12} {run['machine']['hostname']:<20} "
+              f"{run['corpus_id']:<40} {run['samples']} samples")
+    connection.close()
+    return 0
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Sudoku solving algorithms")
+    parser.add_argument("command", nargs="?", default="run", choices=["run", "sweep", "compare", "history"],
+                        help="run benchmarks (default), sweep over the number of givens, compare two "
+                             "recorded runs or list recorded runs")
+    parser.add_argument("--store", default=benchmark_store.DEFAULT_STORE, help="SQLite results store")
+    parser.add_argument("--puzzles", type=int, default=num_puzzles, help="puzzles per difficulty")
+    parser.add_argument("--seed", type=int, default=0, help="corpus seed")
+    parser.add_argument("--difficulties", nargs="+", default=["Easy", "Medium", "Hard"])
+    parser.add_argument("--algorithms", nargs="+", help="only run these solver functions")
+    parser.add_argument("--variants", nargs="+", default=[], choices=sorted(VARIANTS),
+                        help="run: benchmark puzzles with these extra constraints")
+    parser.add_argument("--chains", type=int, default=3,
+                        help="sweep: puzzle chains, i.e. samples per number of givens")
+    parser.add_argument("--clue-step", type=int, default=1, help="sweep: solve every n-th number of givens")
+    parser.add_argument("--isolate", action="store_true", help="run every solve in a fresh process")
+    parser.add_argument("--timeout", type=float,
+                        help="per-solve time limit in seconds (implies --isolate; sweep default 10)")
+    parser.add_argument("--memory", action="store_true",
+                        help="also measure peak allocated memory (slows the timed solves down)")
+    parser.add_argument("--output-dir", default="charts", help="directory for chart images")
+    parser.add_argument("--no-charts", action="store_true", help="do not render charts")
+    parser.add_argument("--show", action="store_true", help="also show charts interactively")
+    parser.add_argument("--no-store", action="store_true", help="do not record the run")
+    parser.add_argument("--baseline", type=int, help="baseline run id for compare (default: previous run)")
+    parser.add_argument("--candidate", type=int, help="candidate run id for compare (default: latest run)")
+    parser.add_argument("--alpha", type=float, default=0.05, help="significance level for compare")
+    parser.add_argument("--min-slowdown", type=float, default=0.05,
+                        help="smallest relative slowdown compare reports (0.05 = 5%%)")
+    parser.add_argument("--min-samples", type=int, default=6,
+                        help="fewest puzzles solved in both runs for compare to test a solver")
+    parser.add_argument("--profile", action="store_true",
+                        help="run: profile each solver and difficulty instead of benchmarking them")
+    parser.add_argument("--profile-mode", default="deterministic", choices=["deterministic", "sampling"],
+                        help="profile: cProfile every call, or sample stacks with little overhead")
+    parser.add_argument("--profile-dir", default="profiles",
+                        help="profile: directory for .prof files and collapsed stacks")
+    parser.add_argument("--top", type=int, default=15, help="profile: hotspots to print per profile")
+    parser.add_argument("--sample-interval", type=float, default=1.0,
+                        help="profile: milliseconds between stack samples in sampling mode")
+    args = parser.parse_args()
+    if args.timeout is not None:
+        args.isolate = True
+
+    if args.command == "sweep":
+        return run_sweep(args)
+    if args.command == "compare":
+        return compare(args)
+    if args.command == "history":
+        return history(args)
+    if args.profile:
+        return run_profiles(args)
+    return run_benchmarks(args)
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
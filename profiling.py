@@ -0,0 +1,182 @@
+import os
+import sys
+import time
+import threading
+from collections import Counter, defaultdict
+
+# Profiling modes
+DETERMINISTIC = "deterministic"  # cProfile: every call is recorded, exact counts, slows the solve down
+SAMPLING = "sampling"  # A thread samples the solving thread's stack, little overhead but approximate
+
+# Collapsed stack counts from deterministic profiles are in microseconds
+MICROSECONDS = 1_000_000
+
+
+def frame_label(filename, line, name):
+    # Label of a function in summaries and collapsed stacks; ";" separates stack frames there
+    if filename == "~":
+        return name.replace(";", ",")  # Built-in functions
+    return f"{name} ({os.path.basename(filename)}:{line})".replace(";", ",")
+
+
+def run_solves(solving_function, puzzles):
+    # Solve copies of the puzzles, copied up front so copying the corpus is not profiled
+    copies = [puzzle.copy() for puzzle in puzzles]
+    start_time = time.perf_counter()
+    for puzzle in copies:
+        solving_function(puzzle)
+    return time.perf_counter() - start_time
+
+
+def profile_deterministic(solving_function, puzzles):
+    # Returns the pstats.Stats of solving every puzzle and the wall time under the profiler.
+    # Work done in worker processes (portfolio, parallel search) is not seen by the profiler.
+    import cProfile
+    import pstats
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        wall_time = run_solves(solving_function, puzzles)
+    finally:
+        profiler.disable()
+    return pstats.Stats(profiler), wall_time
+
+
+def deterministic_hotspots(stats, top):
+    # The top functions by own time as (label, calls, own seconds, cumulative seconds)
+    rows = [(frame_label(*function), calls, own_time, cumulative_time)
+            for function, (_, calls, own_time, cumulative_time, _) in stats.stats.items()]
+    rows.sort(key=lambda row: row[2], reverse=True)
+    return rows[:top]
+
+
+def deterministic_stacks(stats, min_time=1e-6):
+    # Collapsed stacks from the caller graph of a deterministic profile. cProfile only keeps
+    # caller-callee pairs, so the time of a function called from several stacks is split
+    # among them in proportion to the time each call edge took. Recursion is cut at the
+    # first repeated function.
+    callees = defaultdict(list)
+    roots = []
+    for function, (_, _, _, _, callers) in stats.stats.items():
+        known_callers = [caller for caller in callers if caller in stats.stats]
+        if not known_callers:
+            roots.append(function)
+        for caller in known_callers:
+            callees[caller].append((function, callers[caller][3]))
+
+    stacks = Counter()
+
+    def walk(function, path, labels, path_time):
+        _, _, own_time, cumulative_time, _ = stats.stats[function]
+        share = path_time / cumulative_time if cumulative_time else 0
+        stacks[";".join(labels)] += own_time * share * MICROSECONDS
+        for callee, edge_time in callees[function]:
+            callee_time = edge_time * share
+            if callee not in path and callee_time >= min_time:
+                walk(callee, path | {callee}, labels + [frame_label(*callee)], callee_time)
+
+    for root in roots:
+        walk(root, {root}, [frame_label(*root)], stats.stats[root][3])
+    return Counter({stack: round(count) for stack, count in stacks.items() if round(count) > 0})
+
+
+class StackSampler:
+    # Samples the stack of the thread that starts it from a background thread every interval
+    # seconds. Stacks are recorded below the frame that called start. The interpreter only
+    # switches threads every sys.getswitchinterval() seconds, so that is lowered to the
+    # sampling interval while the sampler runs.
+    def __init__(self, interval=0.001):
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self.stop_event = threading.Event()
+
+    def start(self):
+        self.thread_id = threading.get_ident()
+        self.base_frame = sys._getframe(1)
+        self.switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(min(self.switch_interval, self.interval))
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        self.thread.join()
+        sys.setswitchinterval(self.switch_interval)
+
+    def run(self):
+        while not self.stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            labels = []
+            while frame is not None and frame is not self.base_frame:
+                code = frame.f_code
+                labels.append(frame_label(code.co_filename, code.co_firstlineno, code.co_name))
+                frame = frame.f_back
+            if labels:
+                self.stacks[";".join(reversed(labels))] += 1
+                self.samples += 1
+
+
+def profile_sampling(solving_function, puzzles, interval=0.001):
+    # Returns the StackSampler that sampled solving every puzzle and the wall time
+    sampler = StackSampler(interval)
+    sampler.start()
+    try:
+        wall_time = run_solves(solving_function, puzzles)
+    finally:
+        sampler.stop()
+    return sampler, wall_time
+
+
+def sampled_hotspots(stacks, top):
+    # The top functions by own samples as (label, own samples, samples on the stack)
+    own = Counter()
+    total = Counter()
+    for stack, count in stacks.items():
+        labels = stack.split(";")
+        own[labels[-1]] += count
+        for label in set(labels):
+            total[label] += count
+    return [(label, count, total[label]) for label, count in own.most_common(top)]
+
+
+def write_collapsed(stacks, path):
+    # One "frame;frame;frame count" line per stack, the input of flamegraph.pl and speedscope
+    with open(path, "w") as file:
+        for stack, count in sorted(stacks.items()):
+            file.write(f"{stack} {count}\n")
+
+
+def profile_solver(solving_function, puzzles, difficulty, output_dir, mode=DETERMINISTIC, top=15,
+                   interval=0.001):
+    # Profile one solver on one difficulty's puzzles, save the profile and its collapsed stacks
+    # to output_dir and print the top hotspots. Returns the paths of the saved files.
+    os.makedirs(output_dir, exist_ok=True)
+    name = f"{solving_function.__name__}_{difficulty.lower()}"
+    folded_path = os.path.join(output_dir, f"{name}.folded")
+
+    print(f"Profile: {solving_function.__name__}, {difficulty} ({len(puzzles)} puzzles, {mode})")
+    if mode == SAMPLING:
+        sampler, wall_time = profile_sampling(solving_function, puzzles, interval)
+        write_collapsed(sampler.stacks, folded_path)
+        paths = [folded_path]
+        print(f"Wall time: {wall_time:.3f} seconds, {sampler.samples} samples")
+        print(f"{'Own %':>7} {'Total %':>8}  Function")
+        for label, own_samples, total_samples in sampled_hotspots(sampler.stacks, top):
+            print(f"{own_samples / sampler.samples * 100:>6.1f}% {total_samples / sampler.samples * 100:>7.1f}%  "
+                  f"{label}")
+    else:
+        stats, wall_time = profile_deterministic(solving_function, puzzles)
+        prof_path = os.path.join(output_dir, f"{name}.prof")
+        stats.dump_stats(prof_path)
+        write_collapsed(deterministic_stacks(stats), folded_path)
+        paths = [prof_path, folded_path]
+        print(f"Wall time under the profiler: {wall_time:.3f} seconds, {stats.total_calls} calls")
+        print(f"{'Calls':>10} {'Own s':>9} {'Own %':>7} {'Cumul. s':>9}  Function")
+        for label, calls, own_time, cumulative_time in deterministic_hotspots(stats, top):
+            share = own_time / stats.total_tt * 100 if stats.total_tt else 0
+            print(f"{calls:>10} {own_time:>9.4f} {share:>6.1f}% {cumulative_time:>9.4f}  {label}")
+    print(f"Saved: {', '.join(paths)}")
+    print("-----------------------------")
+    return paths
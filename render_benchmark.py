@@ -0,0 +1,102 @@
+import os
+import time
+import random
+import argparse
+
+# Render off-screen through the SDL dummy driver so the benchmark runs headless
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+from sudoku_generator import generate_sudoku
+from rendering import (WHITE, BLACK, GRAY, GREEN, RED, BLUE, WINDOW_WIDTH, WINDOW_HEIGHT, CELL_SIZE,
+                       BUTTON_WIDTH, BUTTON_HEIGHT, BUTTON_MARGIN, GRID_Y, GRID_SIZE,
+                       Button, BoardRenderer, cell_position, draw_background)
+
+
+def legacy_frame(window, fonts, puzzle, buttons, selected_cell):
+    # The original main loop body: clear the window, redraw every line and cell, render
+    # every glyph and button label from the font, then flip the whole display.
+    font_large, _, font_small = fonts
+    window.fill(WHITE)
+    draw_background(window, False, WHITE)
+    for row in range(9):
+        for col in range(9):
+            cell_x, cell_y = cell_position(row, col)
+            if selected_cell == (row, col):
+                pygame.draw.rect(window, GREEN, (cell_x, cell_y, CELL_SIZE, CELL_SIZE), 3)
+            value = puzzle.get_value(row, col)
+            if (row, col) == selected_cell:
+                number_color = BLUE
+            elif puzzle.is_initial_value(row, col):
+                number_color = RED
+            else:
+                number_color = BLACK
+            if value != 0:
+                cell_text = font_large.render(str(value), True, number_color)
+                window.blit(cell_text, cell_text.get_rect(
+                    center=(cell_x + CELL_SIZE // 2, cell_y + CELL_SIZE // 2)))
+    for button in buttons:
+        pygame.draw.rect(window, button.color, button.rect())
+        text = font_small.render(button.text, True, BLACK)
+        window.blit(text, text.get_rect(center=button.rect().center))
+    pygame.display.flip()
+
+
+def cached_frame(renderer, puzzle, buttons, selected_cell):
+    dirty_rects = renderer.draw(puzzle, selected_cell, None, False, buttons)
+    if dirty_rects:
+        pygame.display.update(dirty_rects)
+
+
+def make_buttons():
+    buttons = []
+    start_x = (WINDOW_WIDTH - ((BUTTON_WIDTH + BUTTON_MARGIN) * 6 - BUTTON_MARGIN)) // 2
+    for i, text in enumerate(["Easy", "Medium", "Hard", "Hint", "Solve", "Check"]):
+        position = (start_x + (BUTTON_WIDTH + BUTTON_MARGIN) * i, GRID_Y + GRID_SIZE + 20)
+        buttons.append(Button(text, position, BUTTON_WIDTH, BUTTON_HEIGHT, GRAY, GREEN, None))
+    return buttons
+
+
+def time_frames(frame, frames):
+    start_time = time.perf_counter()
+    for i in range(frames):
+        frame(i)
+    return (time.perf_counter() - start_time) / frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless frame-time benchmark for the Sudoku board renderer")
+    parser.add_argument("--frames", type=int, default=500, help="frames to draw per scenario")
+    args = parser.parse_args()
+
+    pygame.init()
+    window = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+    fonts = (pygame.font.Font(None, 48), pygame.font.Font(None, 32), pygame.font.Font(None, 24))
+    buttons = make_buttons()
+    puzzle = generate_sudoku("Medium")
+    renderer = BoardRenderer(window, *fonts)
+    editable_cells = [(row, col) for row in range(9) for col in range(9) if not puzzle.is_initial_value(row, col)]
+
+    # Idle: nothing changes between frames
+    legacy_idle = time_frames(lambda i: legacy_frame(window, fonts, puzzle, buttons, None), args.frames)
+    cached_idle = time_frames(lambda i: cached_frame(renderer, puzzle, buttons, None), args.frames)
+
+    # Editing: one cell is selected and changed every frame
+    def edit(i):
+        row, col = editable_cells[i % len(editable_cells)]
+        puzzle.set_value(row, col, random.randint(0, 9))
+        return row, col
+
+    legacy_edit = time_frames(lambda i: legacy_frame(window, fonts, puzzle, buttons, edit(i)), args.frames)
+    cached_edit = time_frames(lambda i: cached_frame(renderer, puzzle, buttons, edit(i)), args.frames)
+
+    print(f"Frames per scenario: {args.frames}")
+    print(f"Idle frame:    legacy {legacy_idle * 1000:.3f} ms, cached {cached_idle * 1000:.3f} ms, "
+          f"speedup {legacy_idle / cached_idle:.1f}x")
+    print(f"Editing frame: legacy {legacy_edit * 1000:.3f} ms, cached {cached_edit * 1000:.3f} ms, "
+          f"speedup {legacy_edit / cached_edit:.1f}x")
+    pygame.quit()
+
+
+if __name__ == "__main__":
+    main()
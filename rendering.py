@@ -0,0 +1,261 @@
+import pygame
+
+# Define colors
+WHITE = (255, 255, 255)
+BLACK = (0, 0, 0)
+GRAY = (200, 200, 200)
+GREEN = (0, 255, 0)
+RED = (255, 0, 0)
+BLUE = (0, 0, 255)
+LIGHT_RED = (255, 200, 200)
+
+# Set up the window
+WINDOW_WIDTH = 800
+WINDOW_HEIGHT = 900
+
+# Define cell sizes and margins
+CELL_SIZE = 60
+CELL_MARGIN = 10
+
+# Define Sudoku puzzle grid position and size
+# Calculate the grid position to center it in the window
+GRID_SIZE = CELL_SIZE * 9 + CELL_MARGIN * 10
+GRID_X = (WINDOW_WIDTH - GRID_SIZE) // 2
+GRID_Y = (WINDOW_HEIGHT - GRID_SIZE) // 2
+
+# Define button size.
+BUTTON_WIDTH = 100
+BUTTON_HEIGHT = 40
+BUTTON_MARGIN = 20
+
+# Default frame cap for the main loop
+FRAME_RATE = 30
+
+
+class GlyphCache:
+    # Pre-rendered text surfaces keyed by (text, color) so each glyph is rendered once.
+    def __init__(self, font):
+        self.font = font
+        self.glyphs = {}
+
+    def get(self, text, color):
+        key = (text, color)
+        glyph = self.glyphs.get(key)
+        if glyph is None:
+            glyph = self.font.render(str(text), True, color)
+            self.glyphs[key] = glyph
+        return glyph
+
+
+# Define the Button class
+class Button:
+    def __init__(self, text, position, width, height, color, hover_color, callback):
+        self.text = text
+        self.position = position
+        self.width = width
+        self.height = height
+        self.color = color
+        self.hover_color = hover_color
+        self.callback = callback
+
+    def rect(self):
+        return pygame.Rect(self.position[0], self.position[1], self.width, self.height)
+
+    def draw(self, surface, glyphs):
+        if self.is_hovered():
+            pygame.draw.rect(surface, self.hover_color, self.rect())
+        else:
+            pygame.draw.rect(surface, self.color, self.rect())
+        text = glyphs.get(self.text, BLACK)
+        text_rect = text.get_rect(center=(self.position[0] + self.width // 2, self.position[1] + self.height // 2))
+        surface.blit(text, text_rect)
+
+    def is_hovered(self):
+        mouse_pos = pygame.mouse.get_pos()
+        return self.position[0] <= mouse_pos[0] <= self.position[0] + self.width \
+               and self.position[1] <= mouse_pos[1] <= self.position[1] + self.height
+
+
+class Dialog:
+    def __init__(self, title, options):
+        self.title = title
+        self.options = options
+        self.buttons = []
+
+        # Buttons start just below the title so a full list stays clear of the main buttons
+        for idx, option in enumerate(options):
+            button_x = WINDOW_WIDTH // 2 - BUTTON_WIDTH // 2
+            button_y = WINDOW_HEIGHT // 3 + BUTTON_HEIGHT + idx * \
+                (BUTTON_HEIGHT + BUTTON_MARGIN // 2)
+            button = Button(option["text"], (button_x, button_y),
+                            BUTTON_WIDTH, BUTTON_HEIGHT, GRAY, GREEN, option["callback"])
+            self.buttons.append(button)
+
+    def show(self, surface, title_glyphs, button_glyphs):
+        dialog_rect = pygame.Rect(
+            WINDOW_WIDTH // 4, WINDOW_HEIGHT // 6, WINDOW_WIDTH // 2, WINDOW_HEIGHT // 1)
+        pygame.draw.rect(surface, GRAY, dialog_rect)
+
+        title_text = title_glyphs.get(self.title, BLACK)
+        title_rect = title_text.get_rect(
+            center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 3))
+        surface.blit(title_text, title_rect)
+
+        for button in self.buttons:
+            button.draw(surface, button_glyphs)
+
+
+def cell_position(row, col):
+    cell_x = GRID_X + col * (CELL_SIZE + CELL_MARGIN) + CELL_MARGIN
+    cell_y = GRID_Y + row * (CELL_SIZE + CELL_MARGIN) + CELL_MARGIN
+    return cell_x, cell_y
+
+
+def draw_background(surface, puzzle_solved, cell_color):
+    # Draw the empty board: cell backgrounds, the outer border, the main 3x3 lines and the lighter cell lines
+    surface.fill(WHITE)
+    pygame.draw.rect(
+        surface, GREEN if puzzle_solved else BLACK, (GRID_X, GRID_Y, GRID_SIZE, GRID_SIZE), 3)
+    for row in range(9):
+        for col in range(9):
+            cell_x, cell_y = cell_position(row, col)
+            pygame.draw.rect(surface, cell_color, (cell_x, cell_y, CELL_SIZE, CELL_SIZE))
+
+    for row in range(9):
+        for col in range(9):
+            cell_x, cell_y = cell_position(row, col)
+
+            if row % 3 == 0 and row != 0:
+                pygame.draw.line(surface, GREEN if puzzle_solved else BLACK, (GRID_X, cell_y),
+                                 (GRID_X + GRID_SIZE, cell_y), 3)
+            if col % 3 == 0 and col != 0:
+                pygame.draw.line(surface, GREEN if puzzle_solved else BLACK, (cell_x, GRID_Y),
+                                 (cell_x, GRID_Y + GRID_SIZE), 3)
+
+            if row != 0:
+                pygame.draw.line(surface, GREEN if puzzle_solved else GRAY, (cell_x, cell_y),
+                                 (cell_x + CELL_SIZE, cell_y), 1)
+            if col != 0:
+                pygame.draw.line(surface, GREEN if puzzle_solved else GRAY, (cell_x, cell_y),
+                                 (cell_x, cell_y + CELL_SIZE), 1)
+
+
+class BoardRenderer:
+    # Draws the board, buttons and dialog, remembering what is on screen so that each frame
+    # only repaints the cells and buttons whose appearance changed. draw() returns the list of
+    # dirty rectangles to pass to pygame.display.update.
+    def __init__(self, surface, font_large, font_medium, font_small):
+        self.surface = surface
+        self.large_glyphs = GlyphCache(font_large)
+        self.medium_glyphs = GlyphCache(font_medium)
+        self.small_glyphs = GlyphCache(font_small)
+        self.backgrounds = {}
+        self.cell_states = [[None] * 9 for _ in range(9)]
+        self.button_states = {}
+        self.frame_state = None
+        self.invalid = True
+
+    def invalidate(self):
+        # Force a full repaint on the next draw, e.g. after the window was exposed
+        self.invalid = True
+
+    def background(self, puzzle_solved, conflicting):
+        # Empty boards are rendered once per look and then copied from, cell by cell
+        key = (puzzle_solved, conflicting)
+        background = self.backgrounds.get(key)
+        if background is None:
+            background = pygame.Surface(self.surface.get_size())
+            draw_background(background, puzzle_solved, LIGHT_RED if conflicting else WHITE)
+            self.backgrounds[key] = background
+        return background
+
+    def cell_state(self, puzzle, row, col, selected_cell, selected_number):
+        value = puzzle.get_value(row, col)
+        selected = selected_cell == (row, col)
+
+        # Determine the color for the number
+        if selected:
+            number_color = BLUE  # Selected number color
+        elif puzzle.is_initial_value(row, col):
+            number_color = RED  # Initial puzzle value color
+        else:
+            number_color = BLACK  # Editable cell number color or user-entered value color
+
+        return (value, number_color, selected, selected_number if selected else None,
+                puzzle.is_conflicting(row, col))
+
+    def draw_cell(self, row, col, state, puzzle_solved):
+        value, number_color, selected, selected_number, conflicting = state
+        cell_x, cell_y = cell_position(row, col)
+        cell_rect = pygame.Rect(cell_x, cell_y, CELL_SIZE, CELL_SIZE)
+
+        # Copy the cell background and the grid lines crossing it, highlighting cells that
+        # conflict with another entry
+        self.surface.blit(self.background(puzzle_solved, conflicting), cell_rect, cell_rect)
+
+        # Draw the selected cell
+        if selected:
+            pygame.draw.rect(self.surface, GREEN, cell_rect, 3)
+
+        # Draw the numbers
+        if value != 0:
+            cell_text = self.large_glyphs.get(value, number_color)
+            self.surface.blit(cell_text, cell_text.get_rect(center=cell_rect.center))
+
+        # Draw the selected number
+        if selected_number is not None:
+            number_text = self.small_glyphs.get(selected_number, RED)
+            self.surface.blit(number_text, number_text.get_rect(center=cell_rect.center))
+
+        return cell_rect
+
+    def draw_button(self, button):
+        rect = button.rect()
+        self.surface.fill(WHITE, rect)
+        button.draw(self.surface, self.small_glyphs)
+        return rect
+
+    def draw(self, puzzle, selected_cell, selected_number, puzzle_solved, buttons, dialog=None):
+        # The whole frame is repainted when the solved state or dialog visibility changes
+        frame_state = (puzzle_solved, dialog)
+        if frame_state != self.frame_state:
+            self.frame_state = frame_state
+            self.invalid = True
+
+        # With the dialog open any change is repainted in full so the dialog stays on top
+        full_repaint = self.invalid
+        dirty_rects = []
+
+        for row in range(9):
+            for col in range(9):
+                state = self.cell_state(puzzle, row, col, selected_cell, selected_number)
+                if state != self.cell_states[row][col]:
+                    self.cell_states[row][col] = state
+                    if dialog is not None:
+                        full_repaint = True
+                    elif not full_repaint:
+                        dirty_rects.append(self.draw_cell(row, col, state, puzzle_solved))
+
+        all_buttons = buttons + (dialog.buttons if dialog is not None else [])
+        for button in all_buttons:
+            hovered = button.is_hovered()
+            if self.button_states.get(id(button)) != hovered:
+                self.button_states[id(button)] = hovered
+                if dialog is not None:
+                    full_repaint = True
+                elif not full_repaint:
+                    dirty_rects.append(self.draw_button(button))
+
+        if full_repaint:
+            self.invalid = False
+            self.surface.blit(self.background(puzzle_solved, False), (0, 0))
+            for row in range(9):
+                for col in range(9):
+                    self.draw_cell(row, col, self.cell_states[row][col], puzzle_solved)
+            for button in buttons:
+                button.draw(self.surface, self.small_glyphs)
+            if dialog is not None:
+                dialog.show(self.surface, self.medium_glyphs, self.small_glyphs)
+            return [self.surface.get_rect()]
+
+        return dirty_rects
@@ -0,0 +1,77 @@
+import sys
+import json
+import time
+import random
+import argparse
+
+from game_state import SudokuGame, DIFFICULTY_MEDIUM, DIFFICULTIES
+
+# Default script: play a round per difficulty with cell entry, hints, a check and a solve
+DEFAULT_SCRIPT = []
+for difficulty in DIFFICULTIES:
+    DEFAULT_SCRIPT += [
+        {"action": "new_puzzle", "difficulty": difficulty},
+        {"action": "select", "row": 4, "col": 4},
+        {"action": "type", "number": 5},
+        {"action": "enter"},
+        {"action": "hint"},
+        {"action": "hint"},
+        {"action": "check"},
+        {"action": "solve", "algorithm": "Backtracking"},
+        {"action": "check"},
+    ]
+
+
+def load_script(path):
+    # A script is either a JSON list of actions or one JSON action per line
+    with open(path) as script_file:
+        text = script_file.read()
+    if text.lstrip().startswith("["):
+        return json.loads(text)
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+def replay(script, repeat=1, game=None):
+    # Run the actions against a headless game and collect per-action latencies in seconds
+    if game is None:
+        game = SudokuGame(DIFFICULTY_MEDIUM)
+    latencies = {}
+    for _ in range(repeat):
+        for action in script:
+            start_time = time.perf_counter()
+            game.apply(action)
+            elapsed_time = time.perf_counter() - start_time
+            latencies.setdefault(action["action"], []).append(elapsed_time)
+    return latencies
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay scripted Sudoku actions without a display")
+    parser.add_argument("script", nargs="?", help="JSON or JSON lines action script (default: built-in round)")
+    parser.add_argument("--repeat", type=int, default=1, help="number of times to replay the script")
+    parser.add_argument("--seed", type=int, help="random seed for reproducible puzzles")
+    args = parser.parse_args()
+
+    if args.seed is not None:
+        random.seed(args.seed)
+    script = load_script(args.script) if args.script else DEFAULT_SCRIPT
+
+    start_time = time.perf_counter()
+    latencies = replay(script, args.repeat)
+    total_time = time.perf_counter() - start_time
+
+    print(f"{'Action':<12}{'Count':>8}{'Mean (ms)':>12}{'p50 (ms)':>12}{'p99 (ms)':>12}{'Max (ms)':>12}")
+    for name, samples in latencies.items():
+        print(f"{name:<12}{len(samples):>8}{sum(samples) / len(samples) * 1000:>12.3f}"
+              f"{percentile(samples, 0.5) * 1000:>12.3f}{percentile(samples, 0.99) * 1000:>12.3f}"
+              f"{max(samples) * 1000:>12.3f}")
+    print(f"Total: {total_time:.3f} seconds")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,261 @@
+import heapq
+
+# Literals use the DIMACS convention: variable v is the literal v, its negation is -v.
+# Variable values are 1 (true), -1 (false) or 0 (unassigned).
+
+# Conflicts before the first restart; later restarts follow the Luby sequence times this
+RESTART_BASE = 100
+ACTIVITY_DECAY = 0.95
+
+
+def luby(index):
+    # The index-th element (from 1) of the Luby sequence 1, 1, 2, 1, 1, 2, 4, 1, ...
+    power = 1
+    while (1 << power) - 1 < index:
+        power += 1
+    if (1 << power) - 1 == index:
+        return 1 << (power - 1)
+    return luby(index - (1 << (power - 1)) + 1)
+
+
+class CDCLSolver:
+    # Conflict-driven clause learning SAT solver with two watched literals per clause,
+    # first-UIP clause learning with non-chronological backjumping, VSIDS-style variable
+    # activities, phase saving and Luby restarts.
+    def __init__(self, num_vars):
+        self.num_vars = num_vars
+        self.clauses = []
+        self.watches = {}
+        self.values = [0] * (num_vars + 1)
+        self.levels = [0] * (num_vars + 1)
+        self.reasons = [None] * (num_vars + 1)
+        self.phases = [1] * (num_vars + 1)
+        self.activity = [0.0] * (num_vars + 1)
+        self.activity_increment = 1.0
+        self.order = [(0.0, var) for var in range(1, num_vars + 1)]
+        self.trail = []
+        self.trail_limits = []
+        self.propagated = 0
+        self.ok = True
+
+        # Statistics of the last solve
+        self.conflicts = 0
+        self.learned_clauses = 0
+        self.decisions = 0
+        self.propagations = 0
+        self.restarts = 0
+
+        for var in range(1, num_vars + 1):
+            self.watches[var] = []
+            self.watches[-var] = []
+
+    def value(self, literal):
+        value = self.values[abs(literal)]
+        return value if literal > 0 else -value
+
+    def decision_level(self):
+        return len(self.trail_limits)
+
+    def add_clause(self, literals):
+        # Add a problem clause before solving; returns False once the formula is known unsatisfiable
+        if not self.ok:
+            return False
+        clause = []
+        for literal in literals:
+            if -literal in clause:
+                return True  # Tautology
+            if literal not in clause and self.value(literal) != -1:
+                if self.value(literal) == 1:
+                    return True  # Already satisfied at the root level
+                clause.append(literal)
+        if not clause:
+            self.ok = False
+        elif len(clause) == 1:
+            self.assign(clause[0], None)
+            self.ok = self.propagate() is None
+        else:
+            self.attach(clause)
+        return self.ok
+
+    def attach(self, clause):
+        index = len(self.clauses)
+        self.clauses.append(clause)
+        self.watches[clause[0]].append(index)
+        self.watches[clause[1]].append(index)
+        return index
+
+    def assign(self, literal, reason):
+        var = abs(literal)
+        self.values[var] = 1 if literal > 0 else -1
+        self.levels[var] = self.decision_level()
+        self.reasons[var] = reason
+        self.trail.append(literal)
+
+    def propagate(self):
+        # Unit propagation over the watched literals. Returns the index of a conflicting clause or None.
+        clauses = self.clauses
+        values = self.values
+        while self.propagated < len(self.trail):
+            false_literal = -self.trail[self.propagated]
+            self.propagated += 1
+            self.propagations += 1
+            watching = self.watches[false_literal]
+            kept = []
+            position = 0
+            while position < len(watching):
+                index = watching[position]
+                position += 1
+                clause = clauses[index]
+                # Keep the falsified watch in position 1
+                if clause[0] == false_literal:
+                    clause[0], clause[1] = clause[1], clause[0]
+                first = clause[0]
+                first_value = values[abs(first)] if first > 0 else -values[abs(first)]
+                if first_value == 1:
+                    kept.append(index)
+                    continue
+
+                # Look for a replacement watch that is not false
+                for k in range(2, len(clause)):
+                    literal = clause[k]
+                    if (values[abs(literal)] if literal > 0 else -values[abs(literal)]) != -1:
+                        clause[1], clause[k] = literal, false_literal
+                        self.watches[literal].append(index)
+                        break
+                else:
+                    kept.append(index)
+                    if first_value == -1:
+                        # Conflict: keep the remaining watches and stop propagating
+                        kept.extend(watching[position:])
+                        self.watches[false_literal] = kept
+                        self.propagated = len(self.trail)
+                        return index
+                    self.assign(first, index)
+            self.watches[false_literal] = kept
+        return None
+
+    def bump(self, var):
+        self.activity[var] += self.activity_increment
+        if self.activity[var] > 1e100:
+            # Rescale all activities to avoid overflow
+            for other in range(1, self.num_vars + 1):
+                self.activity[other] *= 1e-100
+            self.activity_increment *= 1e-100
+            self.order = [(-self.activity[other], other) for other in range(1, self.num_vars + 1)]
+            heapq.heapify(self.order)
+        heapq.heappush(self.order, (-self.activity[var], var))
+
+    def analyze(self, conflict):
+        # First-UIP conflict analysis. Returns the learned clause (asserting literal first)
+        # and the level to backjump to.
+        seen = set()
+        learned = [None]
+        counter = 0
+        literal = None
+        index = len(self.trail) - 1
+        clause = self.clauses[conflict]
+        level = self.decision_level()
+
+        while True:
+            for other in (clause if literal is None else clause[1:]):
+                var = abs(other)
+                if var not in seen and self.levels[var] > 0:
+                    seen.add(var)
+                    self.bump(var)
+                    if self.levels[var] == level:
+                        counter += 1
+                    else:
+                        learned.append(other)
+            # Walk back the trail to the next literal involved in the conflict
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            literal = self.trail[index]
+            index -= 1
+            counter -= 1
+            if counter == 0:
+                break
+            clause = self.clauses[self.reasons[abs(literal)]]
+            seen.discard(abs(literal))
+
+        learned[0] = -literal
+        backjump_level = 0
+        if len(learned) > 1:
+            # Put the literal from the highest remaining level in the second watch position
+            highest = max(range(1, len(learned)), key=lambda i: self.levels[abs(learned[i])])
+            learned[1], learned[highest] = learned[highest], learned[1]
+            backjump_level = self.levels[abs(learned[1])]
+        self.activity_increment /= ACTIVITY_DECAY
+        return learned, backjump_level
+
+    def backtrack(self, level):
+        if self.decision_level() <= level:
+            return
+        limit = self.trail_limits[level]
+        for literal in self.trail[limit:]:
+            var = abs(literal)
+            self.phases[var] = self.values[var]
+            self.values[var] = 0
+            self.reasons[var] = None
+            heapq.heappush(self.order, (-self.activity[var], var))
+        del self.trail[limit:]
+        del self.trail_limits[level:]
+        self.propagated = len(self.trail)
+
+    def pick_branch_literal(self):
+        # Unassigned variable with the highest activity, using its saved phase
+        while self.order:
+            _, var = heapq.heappop(self.order)
+            if self.values[var] == 0:
+                return var if self.phases[var] > 0 else -var
+        return None
+
+    def solve(self):
+        # Returns True if satisfiable (see model()), False otherwise
+        if not self.ok:
+            return False
+        if self.propagate() is not None:
+            self.ok = False
+            return False
+
+        restart_count = 0
+        conflicts_until_restart = RESTART_BASE * luby(1)
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                self.conflicts += 1
+                if self.decision_level() == 0:
+                    self.ok = False
+                    return False
+                learned, backjump_level = self.analyze(conflict)
+                self.backtrack(backjump_level)
+                if len(learned) == 1:
+                    self.assign(learned[0], None)
+                else:
+                    self.assign(learned[0], self.attach(learned))
+                self.learned_clauses += 1
+                conflicts_until_restart -= 1
+            elif conflicts_until_restart <= 0:
+                restart_count += 1
+                self.restarts += 1
+                conflicts_until_restart = RESTART_BASE * luby(restart_count + 1)
+                self.backtrack(0)
+            else:
+                literal = self.pick_branch_literal()
+                if literal is None:
+                    return True
+                self.decisions += 1
+                self.trail_limits.append(len(self.trail))
+                self.assign(literal, None)
+
+    def model(self):
+        # Variables assigned true in the satisfying assignment
+        return [var for var in range(1, self.num_vars + 1) if self.values[var] == 1]
+
+    def stats(self):
+        return {
+            "conflicts": self.conflicts,
+            "learned_clauses": self.learned_clauses,
+            "decisions": self.decisions,
+            "propagations": self.propagations,
+            "restarts": self.restarts,
+        }
@@ -0,0 +1,206 @@
+from sudoku_generator import CLASSIC
+
+# Digit d is bit d of a mask, so bits 1 to 9 are the candidate digits
+ALL_DIGITS = 0b1111111110
+POPCOUNT = [bin(mask).count("1") for mask in range(1 << 10)]
+
+# Cell selection strategies
+FIRST_EMPTY = "first_empty"  # Empty cells in row-major order
+FEWEST_CANDIDATES = "fewest_candidates"  # The empty cell with the fewest candidate digits
+
+
+class SearchCore:
+    # Backtracking search that mutates one flat board in place. Each assignment is recorded on
+    # an undo trail as [cell, candidates not yet tried], so moving through the tree never
+    # allocates a board or recurses, and the search depth is only limited by memory.
+    # The units come from the puzzle's Ruleset; use make_search_core for rules with cages.
+    def __init__(self, grid, strategy=FIRST_EMPTY, rules=CLASSIC):
+        self.strategy = strategy
+        self.cells = [value for row in grid for value in row]
+        self.cell_units = [units for row in rules.cell_units for units in row]
+        self.unit_masks = [0] * len(rules.units)
+        self.trail = []
+        self.consistent = True
+        self.cutoff = False
+
+        # Statistics of the search
+        self.nodes = 0
+        self.backtracks = 0
+
+        self.setup(rules)
+        for cell, value in enumerate(self.cells):
+            if value:
+                bit = 1 << value
+                for unit in self.cell_units[cell]:
+                    if self.unit_masks[unit] & bit:
+                        self.consistent = False  # A given repeats in one of its units
+                self.assign(cell, value)
+        self.empty_cells = [cell for cell, value in enumerate(self.cells) if not value]
+
+    def setup(self, rules):
+        # Extra per-rules state for subclasses, set up before the givens are assigned
+        pass
+
+    def candidates(self, cell):
+        used = 0
+        for unit in self.cell_units[cell]:
+            used |= self.unit_masks[unit]
+        return ALL_DIGITS & ~used
+
+    def assign(self, cell, value):
+        self.cells[cell] = value
+        bit = 1 << value
+        for unit in self.cell_units[cell]:
+            self.unit_masks[unit] |= bit
+
+    def unassign(self, cell):
+        bit = 1 << self.cells[cell]
+        self.cells[cell] = 0
+        for unit in self.cell_units[cell]:
+            self.unit_masks[unit] &= ~bit
+
+    def select_cell(self):
+        # The next cell to branch on and its candidates, or (None, 0) when the board is full
+        if self.strategy == FIRST_EMPTY:
+            # Cells are assigned in order, so the next one is indexed by the trail length
+            depth = len(self.trail)
+            if depth == len(self.empty_cells):
+                return None, 0
+            cell = self.empty_cells[depth]
+            return cell, self.candidates(cell)
+
+        best_cell, best_candidates, best_count = None, 0, 10
+        for cell in self.empty_cells:
+            if not self.cells[cell]:
+                candidates = self.candidates(cell)
+                count = POPCOUNT[candidates]
+                if count < best_count:
+                    best_cell, best_candidates, best_count = cell, candidates, count
+                    if count <= 1:
+                        break
+        return best_cell, best_candidates
+
+    def solutions(self, max_depth=None, callback=None, interval=1024, max_guesses=None):
+        # Yield every solution as a flat list of 81 values. With max_depth, branches are cut
+        # after that many assignments, and with max_guesses after that many assignments to
+        # cells with more than one candidate (forced cells are free); cutoff records whether
+        # any branch was cut. The callback runs every interval nodes and stops the search by
+        # returning True; it may take untried candidates off the trail (see parallel_search).
+        if not self.consistent:
+            return
+        trail = self.trail
+        base_depth = len(trail)
+        guesses = 0
+        is_guess = []  # Whether each trail entry above base_depth is a guess, with max_guesses
+        descend = True
+        while True:
+            if descend:
+                self.nodes += 1
+                if callback is not None and self.nodes % interval == 0 and callback():
+                    return
+                cell, candidates = self.select_cell()
+                if cell is None:
+                    yield self.cells[:]
+                elif not candidates:
+                    pass  # Dead end
+                elif max_depth is not None and len(trail) - base_depth >= max_depth:
+                    self.cutoff = True
+                elif max_guesses is not None:
+                    guess = POPCOUNT[candidates] > 1
+                    if guess and guesses >= max_guesses:
+                        self.cutoff = True
+                    else:
+                        trail.append([cell, candidates])
+                        is_guess.append(guess)
+                        guesses += guess
+                else:
+                    trail.append([cell, candidates])
+
+            # Undo the deepest assignment and try its next candidate, unwinding exhausted cells
+            descend = False
+            while len(trail) > base_depth:
+                entry = trail[-1]
+                cell, remaining = entry
+                if self.cells[cell]:
+                    self.unassign(cell)
+                    self.backtracks += 1
+                if remaining:
+                    bit = remaining & -remaining
+                    entry[1] = remaining ^ bit
+                    self.assign(cell, bit.bit_length() - 1)
+                    descend = True
+                    break
+                trail.pop()
+                if max_guesses is not None:
+                    guesses -= is_guess.pop()
+            if not descend:
+                return
+
+    def solve(self, max_depth=None, max_guesses=None):
+        # The first solution found, or None
+        return next(self.solutions(max_depth, max_guesses=max_guesses), None)
+
+    def count_solutions(self, limit=None):
+        count = 0
+        for _ in self.solutions():
+            count += 1
+            if count == limit:
+                break
+        return count
+
+    def stats(self):
+        return {
+            "nodes": self.nodes,
+            "backtracks": self.backtracks,
+        }
+
+
+class CagedSearchCore(SearchCore):
+    # SearchCore that also tracks killer cage sums, so classic and unit-only variants do not
+    # pay for the cage checks
+    def __init__(self, grid, strategy=FIRST_EMPTY, rules=CLASSIC):
+        SearchCore.__init__(self, grid, strategy, rules)
+        for cage, total in enumerate(self.cage_totals):
+            if self.cage_sums[cage] > total or (not self.cage_empty[cage] and self.cage_sums[cage] != total):
+                self.consistent = False
+
+    def setup(self, rules):
+        # Cage of each cell, and the total, current sum, empty cells and allowed digits of each cage
+        self.cell_cage = [cage for row in rules.cell_cage for cage in row]
+        self.cage_totals = [total for total, _ in rules.cages]
+        self.cage_sums = [0] * len(rules.cages)
+        self.cage_empty = [len(cells) for _, cells in rules.cages]
+        self.cage_masks = [sum(1 << digit for digit in digits) for digits in rules.cage_digits]
+
+    def candidates(self, cell):
+        candidates = SearchCore.candidates(self, cell)
+        cage = self.cell_cage[cell]
+        if cage is not None:
+            # Digits that fit the cage and, in its last empty cell, only the one that meets the total
+            remaining = self.cage_totals[cage] - self.cage_sums[cage]
+            if self.cage_empty[cage] == 1:
+                candidates &= 1 << remaining if 0 < remaining < 10 else 0
+            elif remaining < 10:
+                candidates &= (1 << remaining) - 1
+            candidates &= self.cage_masks[cage]
+        return candidates
+
+    def assign(self, cell, value):
+        SearchCore.assign(self, cell, value)
+        cage = self.cell_cage[cell]
+        if cage is not None:
+            self.cage_sums[cage] += value
+            self.cage_empty[cage] -= 1
+
+    def unassign(self, cell):
+        cage = self.cell_cage[cell]
+        if cage is not None:
+            self.cage_sums[cage] -= self.cells[cell]
+            self.cage_empty[cage] += 1
+        SearchCore.unassign(self, cell)
+
+
+def make_search_core(grid, strategy=FIRST_EMPTY, rules=CLASSIC):
+    if rules.cages:
+        return CagedSearchCore(grid, strategy, rules)
+    return SearchCore(grid, strategy, rules)
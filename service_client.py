@@ -0,0 +1,137 @@
+import sys
+import json
+import time
+import asyncio
+import argparse
+import itertools
+
+from sudoku_generator import generate_sudoku
+from solver_service import DEFAULT_HOST, DEFAULT_PORT
+
+
+class ServiceClient:
+    # Pipelined JSON lines client; responses are matched to requests by id so many requests
+    # can be outstanding on one connection
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.ids = itertools.count()
+        self.waiting = {}
+        self.receiver = asyncio.get_running_loop().create_task(self.receive())
+
+    @classmethod
+    async def connect(cls, host=DEFAULT_HOST, port=DEFAULT_PORT, unix_path=None):
+        if unix_path is not None:
+            reader, writer = await asyncio.open_unix_connection(unix_path, limit=2 ** 20)
+        else:
+            reader, writer = await asyncio.open_connection(host, port, limit=2 ** 20)
+        return cls(reader, writer)
+
+    async def receive(self):
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                break
+            response = json.loads(line)
+            future = self.waiting.pop(response.get("id"), None)
+            if future is not None and not future.done():
+                future.set_result(response)
+        for future in self.waiting.values():
+            if not future.done():
+                future.set_exception(ConnectionError("service closed the connection"))
+
+    async def request(self, op, **params):
+        request_id = next(self.ids)
+        future = asyncio.get_running_loop().create_future()
+        self.waiting[request_id] = future
+        self.writer.write((json.dumps(dict(params, op=op, id=request_id)) + "\n").encode())
+        await self.writer.drain()
+        return await future
+
+    async def generate(self, difficulty="Medium"):
+        return await self.request("generate", difficulty=difficulty)
+
+    async def solve(self, grid, algorithm="backtracking", timeout=None):
+        params = {"grid": grid, "algorithm": algorithm}
+        if timeout is not None:
+            params["timeout"] = timeout
+        return await self.request("solve", **params)
+
+    async def hint(self, grid):
+        return await self.request("hint", grid=grid)
+
+    async def stats(self):
+        return await self.request("stats")
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+        self.receiver.cancel()
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def load_test(args):
+    # Each simulated client keeps one request outstanding on its own connection
+    grids = [generate_sudoku(args.difficulty).grid for _ in range(min(args.requests, 50))]
+    clients = [await ServiceClient.connect(args.host, args.port, args.unix) for _ in range(args.concurrency)]
+    counter = itertools.count()
+    latencies = []
+    errors = {}
+
+    async def worker(client):
+        while True:
+            index = next(counter)
+            if index >= args.requests:
+                return
+            grid = grids[index % len(grids)]
+            start_time = time.perf_counter()
+            if args.op == "generate":
+                response = await client.generate(args.difficulty)
+            elif args.op == "hint":
+                response = await client.hint(grid)
+            else:
+                response = await client.solve(grid, args.algorithm, args.timeout)
+            latencies.append(time.perf_counter() - start_time)
+            if not response["ok"]:
+                errors[response["error"]] = errors.get(response["error"], 0) + 1
+
+    start_time = time.perf_counter()
+    await asyncio.gather(*(worker(client) for client in clients))
+    total_time = time.perf_counter() - start_time
+
+    server_stats = await clients[0].stats()
+    for client in clients:
+        await client.close()
+
+    print(f"Requests: {len(latencies)} {args.op} ({args.difficulty}) with concurrency {args.concurrency}")
+    print(f"Throughput: {len(latencies) / total_time:.1f} requests/second")
+    print(f"Latency p50: {percentile(latencies, 0.5) * 1000:.2f} ms, "
+          f"p90: {percentile(latencies, 0.9) * 1000:.2f} ms, "
+          f"p99: {percentile(latencies, 0.99) * 1000:.2f} ms, "
+          f"max: {max(latencies) * 1000:.2f} ms")
+    print(f"Errors: {sum(errors.values())} {errors if errors else ''}")
+    print(f"Server: {server_stats['batches']} batches, mean batch size {server_stats['mean_batch_size']:.2f}, "
+          f"{server_stats['timeouts']} timeouts")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load generator for the local Sudoku service")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix", help="connect to this Unix socket path instead of TCP")
+    parser.add_argument("--op", choices=["generate", "solve", "hint"], default="solve")
+    parser.add_argument("--algorithm", default="backtracking", help="solver function name for solve requests")
+    parser.add_argument("--difficulty", default="Medium")
+    parser.add_argument("--requests", type=int, default=500, help="total requests to send")
+    parser.add_argument("--concurrency", type=int, default=16, help="concurrent client connections")
+    parser.add_argument("--timeout", type=float, help="per-request timeout in seconds")
+    args = parser.parse_args()
+    asyncio.run(load_test(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+import os
+import queue
+import functools
+import itertools
+import multiprocessing
+from multiprocessing import shared_memory
+
+from sudoku_generator import SudokuPuzzle, CLASSIC
+from search_core import make_search_core, FEWEST_CANDIDATES
+
+# Fixed-size uint8 records. A puzzle record is its 81 cells in row-major order; a result
+# record is the solved grid followed by a status byte.
+PUZZLE_RECORD = 81
+RESULT_RECORD = 82
+
+# Result status bytes
+UNSOLVED = 0
+SOLVED = 1
+FAILED = 2
+
+# Seconds between checks that the workers are alive while waiting for a batch
+POLL_INTERVAL = 0.1
+
+
+# Grid solvers take a 9x9 list and a Ruleset and return the solution as a flat list of 81
+# values, or None. They skip building a SudokuPuzzle, which costs more than the transport.
+
+
+def search_grid(grid, rules):
+    # The search of backtracking, on the grid alone
+    return make_search_core(grid, FEWEST_CANDIDATES, rules).solve()
+
+
+def solve_puzzle(solver, grid, rules):
+    solved = solver(SudokuPuzzle(grid, rules))
+    return None if solved is None else [value for row in solved.grid for value in row]
+
+
+def puzzle_solver(solver):
+    # Grid solver for a solver of SudokuPuzzle objects, such as those in solving_algorithms
+    return functools.partial(solve_puzzle, solver)
+
+
+def solve_range(solver, rules, puzzles, results, start, end):
+    # Solve the puzzle records start to end - 1 and write their result records in place
+    for index in range(start, end):
+        offset = index * PUZZLE_RECORD
+        cells = puzzles[offset:offset + PUZZLE_RECORD]
+        grid = [list(cells[row * 9:row * 9 + 9]) for row in range(9)]
+        result_offset = index * RESULT_RECORD
+        try:
+            solution = solver(grid, rules)
+        except Exception:
+            results[result_offset + 81] = FAILED
+            continue
+        if solution is None:
+            results[result_offset + 81] = UNSOLVED
+        else:
+            results[result_offset:result_offset + 81] = bytes(solution)
+            results[result_offset + 81] = SOLVED
+
+
+def batch_worker(solver, rules, puzzle_name, result_name, ranges, done):
+    # Attaches to the shared buffers once, then solves index ranges until it receives None
+    puzzle_memory = shared_memory.SharedMemory(name=puzzle_name)
+    result_memory = shared_memory.SharedMemory(name=result_name)
+    try:
+        while True:
+            job = ranges.get()
+            if job is None:
+                break
+            start, end = job
+            solve_range(solver, rules, puzzle_memory.buf, result_memory.buf, start, end)
+            done.put(job)
+    finally:
+        puzzle_memory.close()
+        result_memory.close()
+
+
+class SharedBatchPool:
+    # Worker processes that solve batches of puzzles through shared memory. Puzzles are
+    # written into one shared buffer and results are read from another, both as fixed-size
+    # uint8 records; only (start, end) index ranges are sent to and from the workers.
+    # solver is a grid solver (see search_grid); wrap puzzle solvers with puzzle_solver.
+    def __init__(self, solver=search_grid, workers=None, capacity=1024, chunk_size=32, rules=CLASSIC):
+        self.workers = workers or os.cpu_count() or 1
+        self.capacity = capacity
+        self.chunk_size = chunk_size
+        self.puzzle_memory = None
+        self.result_memory = None
+        self.processes = []
+        try:
+            self.puzzle_memory = shared_memory.SharedMemory(create=True, size=capacity * PUZZLE_RECORD)
+            self.result_memory = shared_memory.SharedMemory(create=True, size=capacity * RESULT_RECORD)
+            self.ranges = multiprocessing.Queue()
+            self.done = multiprocessing.Queue()
+            for _ in range(self.workers):
+                process = multiprocessing.Process(
+                    target=batch_worker, daemon=True,
+                    args=(solver, rules, self.puzzle_memory.name, self.result_memory.name, self.ranges, self.done))
+                process.start()
+                self.processes.append(process)
+        except BaseException:
+            # Release the segments and workers created so far; nothing else would unlink them
+            self.close()
+            raise
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write_puzzles(self, grids):
+        # Grids may be 9x9 lists or SudokuPuzzle objects
+        buffer = self.puzzle_memory.buf
+        for index, grid in enumerate(grids):
+            rows = getattr(grid, "grid", grid)
+            offset = index * PUZZLE_RECORD
+            buffer[offset:offset + PUZZLE_RECORD] = bytes(itertools.chain.from_iterable(rows))
+
+    def run(self, count):
+        # Solve the first count puzzle records, a chunk of indices per job
+        jobs = 0
+        for start in range(0, count, self.chunk_size):
+            self.ranges.put((start, min(start + self.chunk_size, count)))
+            jobs += 1
+        while jobs:
+            try:
+                self.done.get(timeout=POLL_INTERVAL)
+                jobs -= 1
+            except queue.Empty:
+                if not all(process.is_alive() for process in self.processes):
+                    raise RuntimeError("A batch worker exited before finishing")
+
+    def read_results(self, count):
+        # Solved grids as 9x9 lists, or None for puzzles without a solution or whose solve failed
+        buffer = self.result_memory.buf
+        results = []
+        for index in range(count):
+            offset = index * RESULT_RECORD
+            if buffer[offset + 81] == SOLVED:
+                cells = buffer[offset:offset + 81]
+                results.append([list(cells[row * 9:row * 9 + 9]) for row in range(9)])
+            else:
+                results.append(None)
+        return results
+
+    def solve_batch(self, grids):
+        # Solve any number of grids, capacity records at a time
+        grids = list(grids)
+        results = []
+        for start in range(0, len(grids), self.capacity):
+            window = grids[start:start + self.capacity]
+            self.write_puzzles(window)
+            self.run(len(window))
+            results += self.read_results(len(window))
+        return results
+
+    def close(self):
+        for _ in self.processes:
+            self.ranges.put(None)
+        for process in self.processes:
+            process.join()
+        self.processes = []
+        for memory in [self.puzzle_memory, self.result_memory]:
+            if memory is not None:
+                memory.close()
+                memory.unlink()
+        self.puzzle_memory = None
+        self.result_memory = None
@@ -0,0 +1,327 @@
+import os
+import re
+import sys
+import json
+import math
+import time
+import signal
+import bisect
+import asyncio
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+from sudoku_generator import SudokuPuzzle, generate_sudoku, get_hint
+from variants import rules_by_name
+import solving_algorithms
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# Solvers available to "solve" requests, keyed by function name
+SERVICE_SOLVERS = {
+    solver.__name__: solver for solver in [
+        solving_algorithms.backtracking,
+        solving_algorithms.constraint_propagation,
+        solving_algorithms.solve_sudoku_dfs,
+        solving_algorithms.solve_sudoku_bfs,
+        solving_algorithms.solve_sudoku_ids,
+        solving_algorithms.solve_sudoku_astar,
+        solving_algorithms.solve_sudoku_sat,
+    ]
+}
+DEFAULT_SOLVER = "backtracking"
+
+# The "id" member of a request line, read from lines that are not valid requests
+REQUEST_ID = re.compile(rb'"id"\s*:\s*(-?\d+(?:\.\d+)?|"(?:[^"\\]|\\.)*")')
+
+# Upper bounds of the latency histogram buckets in milliseconds
+LATENCY_BUCKETS_MS = [0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, float("inf")]
+
+
+class LatencyHistogram:
+    # Fixed-bucket latency histogram; percentiles are reported as bucket upper bounds
+    def __init__(self):
+        self.counts = [0] * len(LATENCY_BUCKETS_MS)
+        self.total = 0
+        self.sum_ms = 0.0
+
+    def record(self, latency_ms):
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS_MS, latency_ms)] += 1
+        self.total += 1
+        self.sum_ms += latency_ms
+
+    def percentile(self, fraction):
+        if self.total == 0:
+            return None
+        threshold = fraction * self.total
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS_MS, self.counts):
+            seen += count
+            if seen >= threshold:
+                return bound
+        return LATENCY_BUCKETS_MS[-1]
+
+    def to_dict(self):
+        return {
+            "count": self.total,
+            "mean_ms": self.sum_ms / self.total if self.total else None,
+            "p50_ms": self.percentile(0.5),
+            "p90_ms": self.percentile(0.9),
+            "p99_ms": self.percentile(0.99),
+            "buckets": {("inf" if bound == float("inf") else str(bound)): count
+                        for bound, count in zip(LATENCY_BUCKETS_MS, self.counts)},
+        }
+
+
+def handle_request(request):
+    # Runs a single request inside a worker process. Variant puzzles name their extra
+    # constraints in "variants" and give killer cages as "cages": [[total, [[row, col], ...]], ...].
+    op = request["op"]
+    rules = rules_by_name(request.get("variants", []), request.get("cages"))
+    if op == "generate":
+        puzzle = generate_sudoku(request.get("difficulty", "Medium"), rules)
+        return {"grid": puzzle.grid}
+    if op == "solve":
+        solver = SERVICE_SOLVERS[request.get("algorithm", DEFAULT_SOLVER)]
+        solved = solver(SudokuPuzzle(request["grid"], rules))
+        if solved is None:
+            return {"grid": None, "solved": False}
+        return {"grid": solved.grid, "solved": solved.is_solved()}
+    if op == "hint":
+        row, col, value = get_hint(SudokuPuzzle(request["grid"], rules))
+        return {"row": row, "col": col, "value": value}
+    raise ValueError(f"Unknown op: {op}")
+
+
+def request_error(request):
+    # Why a parsed JSON line is not a request, or None if it is one
+    if not isinstance(request, dict):
+        return "request must be a JSON object"
+    if not isinstance(request.get("op"), str):
+        return "op must be a string"
+    timeout = request.get("timeout")
+    if timeout is not None and (isinstance(timeout, bool) or not isinstance(timeout, (int, float))
+                                or not math.isfinite(timeout) or timeout <= 0):
+        return "timeout must be a positive number of seconds"
+    return None
+
+
+def line_id(line):
+    # The id of a request line that did not parse as a request, or None if it has none
+    match = REQUEST_ID.search(line)
+    if match is None:
+        return None
+    try:
+        return json.loads(match.group(1))
+    except ValueError:
+        return None
+
+
+class RequestTimeout(Exception):
+    pass
+
+
+def raise_timeout(signum, frame):
+    raise RequestTimeout()
+
+
+def run_batch(requests):
+    # Runs a micro-batch in one worker process. Requests whose deadline passed while queued are
+    # skipped, and a failing request only fails itself. A request still running at its deadline
+    # is interrupted by a timer signal, so it stops holding the worker when the client gives up.
+    results = []
+    for request in requests:
+        deadline = request.get("deadline")
+        if deadline is not None and time.time() > deadline:
+            results.append({"ok": False, "error": "timeout"})
+            continue
+        timed = deadline is not None and hasattr(signal, "setitimer")
+        # The timer is disarmed before the result is kept, and a timer that fires while the
+        # request finishes or fails still ends in a single result for it
+        try:
+            try:
+                if timed:
+                    signal.signal(signal.SIGALRM, raise_timeout)
+                    signal.setitimer(signal.ITIMER_REAL, max(deadline - time.time(), 0.001))
+                result = dict(handle_request(request), ok=True)
+            finally:
+                if timed:
+                    signal.setitimer(signal.ITIMER_REAL, 0)
+        except RequestTimeout:
+            result = {"ok": False, "error": "timeout"}
+        except Exception as error:
+            result = {"ok": False, "error": f"{type(error).__name__}: {error}"}
+        results.append(result)
+    return results
+
+
+class SolverService:
+    # Accepts JSON line requests, queues them and dispatches micro-batches to a process pool.
+    # The bounded queue provides backpressure: when it is full, connections stop being read
+    # until workers catch up. Every request has a timeout covering queueing and solving.
+    def __init__(self, workers=None, batch_size=8, batch_window=0.005, queue_size=256, timeout=30.0):
+        self.workers = workers or os.cpu_count() or 1
+        self.pool = ProcessPoolExecutor(self.workers)
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.timeout = timeout
+        self.pending = asyncio.Queue(maxsize=queue_size)
+        self.in_flight = asyncio.Semaphore(self.workers)
+        self.histograms = {}
+        self.batches = 0
+        self.batched_requests = 0
+        self.timeouts = 0
+        self.errors = 0
+
+    def stats(self):
+        return {
+            "queue_depth": self.pending.qsize(),
+            "workers": self.workers,
+            "batches": self.batches,
+            "mean_batch_size": self.batched_requests / self.batches if self.batches else None,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+            "latency": {op: histogram.to_dict() for op, histogram in self.histograms.items()},
+        }
+
+    async def dispatch(self):
+        # Collect up to batch_size requests, waiting at most batch_window after the first one,
+        # and hand the batch to the pool. At most one batch per worker is in flight.
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.pending.get()]
+            deadline = loop.time() + self.batch_window
+            while len(batch) < self.batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.pending.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            await self.in_flight.acquire()
+            loop.create_task(self.run(batch))
+
+    async def run(self, batch):
+        loop = asyncio.get_running_loop()
+        try:
+            self.batches += 1
+            self.batched_requests += len(batch)
+            requests = [request for request, _ in batch]
+            try:
+                results = await loop.run_in_executor(self.pool, run_batch, requests)
+            except Exception as error:
+                results = [{"ok": False, "error": f"{type(error).__name__}: {error}"} for _ in batch]
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            self.in_flight.release()
+
+    async def response(self, request):
+        start_time = time.perf_counter()
+        op = request.get("op")
+        if op == "stats":
+            return dict(self.stats(), ok=True)
+        timeout = request.get("timeout")
+        if timeout is None:
+            timeout = self.timeout
+        request["deadline"] = time.time() + timeout
+        future = asyncio.get_running_loop().create_future()
+        try:
+            await asyncio.wait_for(self.pending.put((request, future)), timeout)
+            response = await asyncio.wait_for(future, timeout - (time.perf_counter() - start_time))
+        except asyncio.TimeoutError:
+            response = {"ok": False, "error": "timeout"}
+        if response.get("error") == "timeout":
+            self.timeouts += 1
+        elif not response["ok"]:
+            self.errors += 1
+        latency_ms = (time.perf_counter() - start_time) * 1000
+        self.histograms.setdefault(op, LatencyHistogram()).record(latency_ms)
+        return response
+
+    async def respond(self, request, writer):
+        # Every request gets a reply, an error reply if handling it failed
+        try:
+            response = await self.response(request)
+        except Exception as error:
+            self.errors += 1
+            response = {"ok": False, "error": f"{type(error).__name__}: {error}"}
+        response["id"] = request.get("id")
+        writer.write((json.dumps(response) + "\n").encode())
+        await writer.drain()
+
+    async def handle_client(self, reader, writer):
+        # Requests on one connection are handled concurrently; responses carry the request id
+        tasks = set()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    request, error = None, "invalid JSON"
+                else:
+                    error = request_error(request)
+                if error is not None:
+                    request_id = request.get("id") if isinstance(request, dict) else line_id(line)
+                    response = {"ok": False, "error": error, "id": request_id}
+                    writer.write((json.dumps(response) + "\n").encode())
+                    continue
+                # Wait for queue space before reading further requests from this connection
+                while self.pending.full():
+                    await asyncio.sleep(self.batch_window)
+                task = asyncio.get_running_loop().create_task(self.respond(request, writer))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT, unix_path=None):
+        dispatcher = asyncio.get_running_loop().create_task(self.dispatch())
+        if unix_path is not None:
+            server = await asyncio.start_unix_server(self.handle_client, path=unix_path)
+            print(f"Sudoku service listening on {unix_path} with {self.workers} workers")
+        else:
+            server = await asyncio.start_server(self.handle_client, host, port)
+            print(f"Sudoku service listening on {host}:{port} with {self.workers} workers")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            dispatcher.cancel()
+            self.pool.shutdown(cancel_futures=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Sudoku generate/solve/hint service (JSON lines)")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--unix", help="listen on this Unix socket path instead of TCP")
+    parser.add_argument("--workers", type=int, help="worker processes (default: CPU count)")
+    parser.add_argument("--batch-size", type=int, default=8, help="maximum requests per micro-batch")
+    parser.add_argument("--batch-window", type=float, default=5.0, help="milliseconds to wait to fill a batch")
+    parser.add_argument("--queue-size", type=int, default=256, help="queued requests before backpressure")
+    parser.add_argument("--timeout", type=float, default=30.0, help="default per-request timeout in seconds")
+    args = parser.parse_args()
+
+    async def run():
+        service = SolverService(args.workers, args.batch_size, args.batch_window / 1000,
+                                args.queue_size, args.timeout)
+        await service.serve(args.host, args.port, args.unix)
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    sys.exit(main())
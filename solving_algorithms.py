@@ -1,32 +1,48 @@
-import numpy as np
-from sudoku_generator import count_conflicts, find_empty_cell
-from collections import deque
+from sudoku_generator import SudokuPuzzle, UNITS, count_conflicts, find_empty_cell
+from sat_solver import CDCLSolver
+from search_core import make_search_core, FIRST_EMPTY, FEWEST_CANDIDATES
+from collections import deque, Counter
 import heapq
+import queue
+import time
+
+def trail_search(puzzle, strategy, max_depth=None):
+    # Solve the puzzle in place with the shared trail-based search core. The node and
+    # backtrack counts are stored on the puzzle as solve_stats.
+    core = make_search_core(puzzle.grid, strategy, puzzle.rules)
+    solution = core.solve(max_depth)
+    puzzle.solve_stats = core.stats()
+    if solution is None:
+        return None
+    for cell in core.empty_cells:
+        puzzle.set_value(cell // 9, cell % 9, solution[cell])
+    return puzzle
 
-def backtracking(puzzle):
-    # Find the next empty cell
-    row, col = find_empty_cell(puzzle.grid)
-
-    for temp_row in range(9):
-        for temp_col in range(9):
-            if puzzle.grid[temp_row][temp_col] == 0:
-                row, col = temp_row, temp_col
-
-    # If no empty cells are found, the Sudoku is solved
-    if row == -1 and col == -1:
-        return puzzle
 
-    # Try different numbers in the empty cell
-    for num in range(1, 10):
-        if puzzle.is_valid_number(row, col, num):
-            puzzle.set_value(row, col, num)
+def backtracking(puzzle):
+    # Backtrack on the empty cell with the fewest candidates, solving the puzzle in place
+    return trail_search(puzzle, FEWEST_CANDIDATES)
+
+
+def solve_sudoku_parallel(puzzle, workers=None):
+    # Split the search tree of one puzzle over worker processes (see parallel_search) and
+    # stop them all at the first solution. Solves the puzzle in place.
+    from parallel_search import parallel_search
+    solution, _, stats = parallel_search(puzzle.grid, puzzle.rules, workers)
+    puzzle.solve_stats = stats
+    if solution is None:
+        return None
+    for cell, value in enumerate(solution):
+        puzzle.set_value(cell // 9, cell % 9, value)
+    return puzzle
 
-            # Recursively solve the Sudoku
-            if puzzle.solve_sudoku():
-                return puzzle
 
-            # If the number is not part of the solution, backtrack and try a different number
-            puzzle.set_value(row, col, 0)
+def count_solutions_parallel(puzzle, workers=None, limit=None):
+    # Number of solutions of the puzzle (at most limit), searched over worker processes
+    from parallel_search import parallel_search
+    _, count, stats = parallel_search(puzzle.grid, puzzle.rules, workers, count_all=True, limit=limit)
+    puzzle.solve_stats = stats
+    return count
 
 
 def constraint_propagation(puzzle):
@@ -39,6 +55,7 @@ def constraint_propagation(puzzle):
         puzzle, cell[0], cell[1]), reverse=True)
 
     progress_made = False
+    nodes = 0  # Values tried
 
     for cell in sorted_cells:
         row, col = cell
@@ -48,6 +65,7 @@ def constraint_propagation(puzzle):
 
         for value in possible_values:
             puzzle.set_value(row, col, value)
+            nodes += 1
 
             # Check if the puzzle remains valid after setting the value
             if puzzle.is_valid():
@@ -57,16 +75,20 @@ def constraint_propagation(puzzle):
         if not progress_made:
             break
 
+    puzzle.solve_stats = {"nodes": nodes}
     return puzzle
 
 def solve_sudoku_bfs(puzzle):
     max_queue_size = 1000
     queue = deque([(puzzle, 0, 0)])
+    nodes = 0  # States taken off the queue
 
     while queue:
         current_puzzle, row, col = queue.popleft()
+        nodes += 1
 
         if current_puzzle.is_solved():
+            current_puzzle.solve_stats = {"nodes": nodes}
             return current_puzzle # Solution found
 
         for num in range(1, 10):
@@ -81,64 +103,42 @@ def solve_sudoku_bfs(puzzle):
 
                 queue.append((new_puzzle, new_row, new_col))
 
+    current_puzzle.solve_stats = {"nodes": nodes}
     return current_puzzle
 
 def solve_sudoku_dfs(puzzle):
-    empty_cell = find_empty_cell(puzzle.grid)
-
-    if puzzle.is_solved():
-        return puzzle  # Puzzle is solved
-
-    row, col = empty_cell
-
-    for num in range(1, 10):
-        if puzzle.is_valid_number(row, col, num):
-            new_puzzle = puzzle.copy()
-            new_puzzle.set_value(row, col, num)
-
-            # Recursive call 
-            result = solve_sudoku_dfs(new_puzzle)
-            if result:
-                return result  # Puzzle is solved
-
-    return None  # No valid solution found
+    # Depth-first search over the empty cells in row-major order, trying 1 to 9 in each
+    return trail_search(puzzle.copy(), FIRST_EMPTY)
 
 
 def solve_sudoku_ids(puzzle):
-    max_depth = 100
-    depth_limit = 100
-
-    while depth_limit <= max_depth:
-        result = depth_limited_search(puzzle, depth_limit)
-        if result is not None:
-            return result
-        depth_limit += 1
+    # Iterative deepening over the guesses of the search: depth-limited searches allowing 0, 1,
+    # 2, ... assignments to cells with more than one candidate, each repeating the shallower
+    # levels. Forced cells do not count, since every solution lies at the depth of the number
+    # of empty cells and limiting all assignments would re-search nearly the whole tree on
+    # every pass. Stops at the first solution, or when a pass cuts no branch and so has seen
+    # the whole tree without one. The core unwinds to the givens after every failed pass, so
+    # one core serves every limit and its node count includes the repeated levels.
+    puzzle = puzzle.copy()
+    core = make_search_core(puzzle.grid, FEWEST_CANDIDATES, puzzle.rules)
+    guess_limit = 0
+    while True:
+        core.cutoff = False
+        solution = core.solve(max_guesses=guess_limit)
+        if solution is not None or not core.cutoff:
+            break
+        guess_limit += 1
+    puzzle.solve_stats = dict(core.stats(), guess_limit=guess_limit)
+    if solution is None:
+        return None
+    for cell in core.empty_cells:
+        puzzle.set_value(cell // 9, cell % 9, solution[cell])
+    return puzzle
 
 
 def depth_limited_search(puzzle, depth_limit):
-    return dls_recursive(puzzle, depth_limit)
-
-
-def dls_recursive(puzzle, depth_limit, current_depth=0):
-    if current_depth == depth_limit:
-        return puzzle
-
-    if puzzle.is_solved():
-        return puzzle
-
-    empty_cell = find_empty_cell(puzzle.grid)
-    row, col = empty_cell
-
-    for num in range(1, 10):
-        if puzzle.is_valid_number(row, col, num):
-            new_puzzle = puzzle.copy()
-            new_puzzle.set_value(row, col, num)
-
-            result = dls_recursive(new_puzzle, depth_limit, current_depth + 1)
-            if result is not None:
-                return result
-
-    return None
+    # Depth-first search that gives up on branches after depth_limit assignments
+    return trail_search(puzzle.copy(), FIRST_EMPTY, depth_limit)
 
 
 class SudokuNode:
@@ -178,11 +178,14 @@ def solve_sudoku_astar(puzzle):
 
     open_list = [start_node]
     closed_set = set()
+    nodes = 0  # Nodes expanded
 
     while open_list:
         current_node = heapq.heappop(open_list)
+        nodes += 1
 
         if current_node.puzzle.is_solved():
+            current_node.puzzle.solve_stats = {"nodes": nodes}
             return current_node.puzzle
 
         closed_set.add(current_node.puzzle)
@@ -194,3 +197,190 @@ def solve_sudoku_astar(puzzle):
                 heapq.heappush(open_list, child_node)
 
     return None
+
+
+
+
+def sat_variable(row, col, num):
+    # Boolean variable meaning "cell (row, col) holds num", numbered 1 to 729
+    return row * 81 + col * 9 + num
+
+
+def sudoku_cnf():
+    # CNF clauses shared by every classic puzzle
+    clauses = []
+    for row in range(9):
+        for col in range(9):
+            # Every cell holds at least one number and at most one number
+            clauses.append([sat_variable(row, col, num) for num in range(1, 10)])
+            for num in range(1, 10):
+                for other in range(num + 1, 10):
+                    clauses.append([-sat_variable(row, col, num), -sat_variable(row, col, other)])
+
+    # Every row, column and subgrid holds each number at least once and at most once
+    for unit in UNITS:
+        for num in range(1, 10):
+            clauses.append([sat_variable(row, col, num) for row, col in unit])
+            for i, (row, col) in enumerate(unit):
+                for other_row, other_col in unit[i + 1:]:
+                    clauses.append([-sat_variable(row, col, num), -sat_variable(other_row, other_col, num)])
+    return clauses
+
+
+def variant_cnf(rules):
+    # Clauses for the units a variant adds to the classic ones. Killer cages also rule out
+    # digits that are in no set of distinct digits adding up to the cage total; the totals
+    # themselves are enforced by solve_sudoku_sat.
+    clauses = []
+    for unit in rules.units[len(UNITS):]:
+        for num in range(1, 10):
+            if len(unit) == 9:
+                clauses.append([sat_variable(row, col, num) for row, col in unit])
+            for i, (row, col) in enumerate(unit):
+                for other_row, other_col in unit[i + 1:]:
+                    clauses.append([-sat_variable(row, col, num), -sat_variable(other_row, other_col, num)])
+    for (_, cells), digits in zip(rules.cages, rules.cage_digits):
+        for row, col in cells:
+            for num in range(1, 10):
+                if num not in digits:
+                    clauses.append([-sat_variable(row, col, num)])
+    return clauses
+
+
+# Built on first use so importing this module stays cheap
+SUDOKU_CNF = None
+
+
+def solve_sudoku_sat(puzzle):
+    # Encode the puzzle as CNF and solve it with the CDCL solver. Killer cage totals are not
+    # in the CNF: a model with a wrong cage sum gets that cage assignment ruled out and the
+    # solver continues. Search statistics (conflicts, learned clauses, decisions,
+    # propagations, restarts) are stored on the puzzle as solve_stats.
+    global SUDOKU_CNF
+    if SUDOKU_CNF is None:
+        SUDOKU_CNF = sudoku_cnf()
+
+    solver = CDCLSolver(729)
+    for clause in SUDOKU_CNF:
+        solver.add_clause(clause)
+    for clause in variant_cnf(puzzle.rules):
+        solver.add_clause(clause)
+
+    # The given numbers become unit clauses
+    for row in range(9):
+        for col in range(9):
+            value = puzzle.get_value(row, col)
+            if value != 0:
+                solver.add_clause([sat_variable(row, col, value)])
+
+    while True:
+        satisfiable = solver.solve()
+        if not satisfiable:
+            break
+        values = {}
+        for var in solver.model():
+            row, rest = divmod(var - 1, 81)
+            col, num = divmod(rest, 9)
+            values[row, col] = num + 1
+
+        # Rule out the digits of any killer cage that misses its total and solve again
+        wrong_cages = [cells for total, cells in puzzle.rules.cages
+                       if sum(values[cell] for cell in cells) != total]
+        if not wrong_cages:
+            break
+        solver.backtrack(0)
+        for cells in wrong_cages:
+            solver.add_clause([-sat_variable(row, col, values[row, col]) for row, col in cells])
+
+    puzzle.solve_stats = solver.stats()
+    if not satisfiable:
+        return None
+
+    for (row, col), value in values.items():
+        puzzle.set_value(row, col, value)
+    return puzzle
+
+def portfolio_worker(engine, grid, rules, results):
+    # Runs one engine in a worker process and always reports its grid (or None when it found
+    # no solution or failed) back to the parent
+    solved = None
+    try:
+        solved = engine(SudokuPuzzle(grid, rules))
+    except Exception:
+        pass
+    finally:
+        results.put((engine.__name__, solved.grid if solved is not None else None))
+
+
+def is_solution_of(grid, puzzle):
+    # A grid is a solution if it is a complete valid Sudoku that keeps every given of the puzzle
+    for row in range(9):
+        for col in range(9):
+            value = puzzle.get_value(row, col)
+            if value != 0 and grid[row][col] != value:
+                return False
+    return SudokuPuzzle(grid, puzzle.rules).is_solved()
+
+
+# Engines raced by solve_sudoku_portfolio
+PORTFOLIO_ENGINES = [backtracking, solve_sudoku_dfs, solve_sudoku_bfs, solve_sudoku_ids, solve_sudoku_astar,
+                     solve_sudoku_sat]
+
+# Seconds between checks that the engines are still running while waiting for their results
+PORTFOLIO_POLL_INTERVAL = 0.1
+
+# Number of races won per (difficulty, engine name), used to learn which engine to pick per difficulty
+portfolio_wins = Counter()
+
+
+def solve_sudoku_portfolio(puzzle, engines=None, timeout=None):
+    # Race several engines on the same puzzle in parallel worker processes. The first verified
+    # solution wins, the remaining workers are terminated and the winner is recorded on the
+    # puzzle as solved_by and in portfolio_wins.
+    import multiprocessing
+
+    engines = engines or PORTFOLIO_ENGINES
+    results = multiprocessing.Queue()
+    workers = [multiprocessing.Process(target=portfolio_worker, args=(engine, puzzle.grid, puzzle.rules, results), daemon=True)
+               for engine in engines]
+    for worker in workers:
+        worker.start()
+
+    winner, solution = None, None
+    deadline = time.monotonic() + timeout if timeout is not None else None
+    reported = 0
+    try:
+        while reported < len(workers):
+            remaining = deadline - time.monotonic() if deadline is not None else None
+            if remaining is not None and remaining <= 0:
+                break
+            # Wait in short slices, so an engine that died without reporting cannot hang the race
+            wait = PORTFOLIO_POLL_INTERVAL if remaining is None else min(remaining, PORTFOLIO_POLL_INTERVAL)
+            try:
+                name, grid = results.get(timeout=wait)
+            except queue.Empty:
+                if not any(worker.is_alive() for worker in workers) and results.empty():
+                    break
+                continue
+            reported += 1
+            if grid is not None and is_solution_of(grid, puzzle):
+                winner, solution = name, grid
+                break
+    finally:
+        # Cancel the engines that are still searching
+        for worker in workers:
+            if worker.is_alive():
+                worker.terminate()
+        for worker in workers:
+            worker.join()
+        results.close()
+
+    if winner is None:
+        return None
+
+    for row in range(9):
+        for col in range(9):
+            puzzle.set_value(row, col, solution[row][col])
+    puzzle.solved_by = winner
+    portfolio_wins[(puzzle.difficulty, winner)] += 1
+    return puzzle
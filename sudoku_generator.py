@@ -1,41 +1,218 @@
 import random
-import pandas as pd
+import threading
+from itertools import combinations
+
+# Precomputed unit tables. Units 0-8 are rows, 9-17 columns and 18-26 the 3x3 boxes.
+UNITS = [[(row, col) for col in range(9)] for row in range(9)] + \
+        [[(row, col) for row in range(9)] for col in range(9)] + \
+        [[(3 * (box // 3) + i, 3 * (box % 3) + j) for i in range(3) for j in range(3)] for box in range(9)]
+
+# Indices of the three units each cell belongs to.
+CELL_UNITS = [[(row, 9 + col, 18 + (row // 3) * 3 + col // 3) for col in range(9)] for row in range(9)]
+
+
+def cage_digits(total, size):
+    # Digits that appear in at least one set of size distinct digits adding up to total
+    digits = set()
+    for combination in combinations(range(1, 10), size):
+        if sum(combination) == total:
+            digits.update(combination)
+    return sorted(digits)
+
+
+class Ruleset:
+    # The constraints of a puzzle compiled into lookup tables. Units are groups of cells that
+    # may not repeat a digit: the 27 classic units first, then any extra units a variant
+    # declares (diagonals, windows, knight-move pairs) and one unit per killer cage. Cages
+    # are (total, cells) pairs whose digits must also add up to total.
+    def __init__(self, name="Classic", extra_units=(), cages=()):
+        self.name = name
+        self.cages = [(total, [tuple(cell) for cell in cells]) for total, cells in cages]
+        self.units = UNITS + [[tuple(cell) for cell in unit] for unit in extra_units] + \
+            [cells for _, cells in self.cages]
+
+        # Units of each cell; classic cells keep their row, column and box in CELL_UNITS order
+        cell_units = [[list(CELL_UNITS[row][col]) for col in range(9)] for row in range(9)]
+        for unit in range(len(UNITS), len(self.units)):
+            for row, col in self.units[unit]:
+                cell_units[row][col].append(unit)
+        self.cell_units = [[tuple(units) for units in row] for row in cell_units]
+
+        # Killer cage of each cell (or None) and the digits each cage can hold
+        self.cell_cage = [[None] * 9 for _ in range(9)]
+        for cage, (_, cells) in enumerate(self.cages):
+            for row, col in cells:
+                self.cell_cage[row][col] = cage
+        self.cage_digits = [cage_digits(total, len(cells)) for total, cells in self.cages]
+
+    def __repr__(self):
+        return f"Ruleset({self.name!r})"
+
+    def __reduce__(self):
+        # Registered rulesets pickle by name, so puzzles sent to other processes stay small and
+        # keep the identity of CLASSIC and the compiled variants; killer rulesets by their cages
+        if registered_rulesets.get(self.name) is self:
+            return registered_ruleset, (self.name,)
+        extra_units = self.units[len(UNITS):len(self.units) - len(self.cages)]
+        return Ruleset, (self.name, extra_units, self.cages)
+
+
+# Rulesets that pickle by name, by name
+registered_rulesets = {}
+
+
+def register_ruleset(rules):
+    registered_rulesets[rules.name] = rules
+    return rules
+
+
+def registered_ruleset(name):
+    # The registered ruleset of a name. Variant combinations not compiled in this process yet
+    # (e.g. in a freshly spawned worker) are compiled from the variant names in the name.
+    if name not in registered_rulesets:
+        from variants import VARIANTS, compile_rules
+        variants_by_name = {variant.name: variant for variant in VARIANTS.values()}
+        compile_rules(*[variants_by_name[variant_name] for variant_name in name.split(" + ")])
+    return registered_rulesets[name]
+
+
+# Rows, columns and boxes only
+CLASSIC = register_ruleset(Ruleset())
+
 
 class SudokuPuzzle:
-    def __init__(self, grid):
+    def __init__(self, grid, rules=CLASSIC):
         self.grid = grid
         self.initial_puzzle = [row[:] for row in grid]
+        self.difficulty = None
+        self.rules = rules
+        # The solution as 81 bytes in row-major order, once known (see solve_in_background)
+        self.solution = None
+        self.build_tracking()
+
+    def build_tracking(self):
+        # Digit counts per unit, number of filled cells and the set of cells in conflict.
+        # These are kept up to date by set_value so validity queries never rescan the board.
+        rules = self.rules
+        self.unit_counts = [[0] * 10 for _ in rules.units]
+        self.filled_count = 0
+        # Sum and number of filled cells of each killer cage
+        self.cage_sums = [0] * len(rules.cages)
+        self.cage_filled = [0] * len(rules.cages)
+        for row in range(9):
+            for col in range(9):
+                value = self.grid[row][col]
+                if value != 0:
+                    self.filled_count += 1
+                    for unit in rules.cell_units[row][col]:
+                        self.unit_counts[unit][value] += 1
+                    cage = rules.cell_cage[row][col]
+                    if cage is not None:
+                        self.cage_sums[cage] += value
+                        self.cage_filled[cage] += 1
+        self.conflicts = set()
+        for row in range(9):
+            for col in range(9):
+                self.refresh_conflict(row, col)
+
+    def refresh_conflict(self, row, col):
+        # A cell is in conflict when its digit appears more than once in any of its units,
+        # or when it is filled and its killer cage cannot reach its total any more
+        value = self.grid[row][col]
+        if value != 0:
+            counts = self.unit_counts
+            for unit in self.rules.cell_units[row][col]:
+                if counts[unit][value] > 1:
+                    self.conflicts.add((row, col))
+                    return
+            if self.cage_sums:
+                cage = self.rules.cell_cage[row][col]
+                if cage is not None and self.is_cage_broken(cage):
+                    self.conflicts.add((row, col))
+                    return
+        self.conflicts.discard((row, col))
+
+    def is_cage_broken(self, cage):
+        total, cells = self.rules.cages[cage]
+        cage_sum = self.cage_sums[cage]
+        return cage_sum > total or (self.cage_filled[cage] == len(cells) and cage_sum != total)
 
     def get_value(self, row, col):
         return self.grid[row][col]
 
     def set_value(self, row, col, value):
+        old_value = self.grid[row][col]
+        if old_value == value:
+            return
         self.grid[row][col] = value
 
+        rules = self.rules
+        units = rules.cell_units[row][col]
+        counts = self.unit_counts
+        if old_value:
+            self.filled_count -= 1
+            for unit in units:
+                counts[unit][old_value] -= 1
+        if value:
+            self.filled_count += 1
+            for unit in units:
+                counts[unit][value] += 1
+
+        # Conflict state of other cells only changes in units where a count crossed between 1 and 2
+        for unit in units:
+            if (old_value and counts[unit][old_value] == 1) or (value and counts[unit][value] == 2):
+                for unit_row, unit_col in rules.units[unit]:
+                    self.refresh_conflict(unit_row, unit_col)
+
+        cage = rules.cell_cage[row][col] if self.cage_sums else None
+        if cage is not None:
+            self.cage_sums[cage] += value - old_value
+            self.cage_filled[cage] += bool(value) - bool(old_value)
+            for cage_row, cage_col in rules.cages[cage][1]:
+                self.refresh_conflict(cage_row, cage_col)
+        self.refresh_conflict(row, col)
+
+    def has_conflicts(self):
+        return len(self.conflicts) > 0
+
+    def is_conflicting(self, row, col):
+        return (row, col) in self.conflicts
+
+    def is_complete(self):
+        return self.filled_count == 81
+
     def is_editable(self, row, col):
         return self.initial_puzzle[row][col] == 0
     
     def copy(self):
-        return SudokuPuzzle([row[:] for row in self.grid])
+        # Copy the tracking state directly rather than rebuilding it from the grid
+        grid = [row[:] for row in self.grid]
+        new_puzzle = SudokuPuzzle.__new__(SudokuPuzzle)
+        new_puzzle.grid = grid
+        new_puzzle.initial_puzzle = [row[:] for row in grid]
+        new_puzzle.difficulty = self.difficulty
+        new_puzzle.solution = self.solution
+        new_puzzle.rules = self.rules
+        new_puzzle.unit_counts = [counts[:] for counts in self.unit_counts]
+        new_puzzle.filled_count = self.filled_count
+        new_puzzle.cage_sums = self.cage_sums[:]
+        new_puzzle.cage_filled = self.cage_filled[:]
+        new_puzzle.conflicts = set(self.conflicts)
+        return new_puzzle
     
     def is_valid_number(self, row, col, num):
-        # Check if the number exists in the same row
-        if num in self.grid[row]:
-            return False
-
-        # Check if the number exists in the same column
-        for i in range(9):
-            if self.grid[i][col] == num:
+        # The number is valid if it does not already appear in any of the cell's units (row,
+        # column, 3x3 subgrid and variant units) and keeps its killer cage able to reach its total
+        counts = self.unit_counts
+        for unit in self.rules.cell_units[row][col]:
+            if counts[unit][num]:
+                return False
+        cage = self.rules.cell_cage[row][col] if self.cage_sums else None
+        if cage is not None:
+            total, cells = self.rules.cages[cage]
+            cage_sum = self.cage_sums[cage] + num
+            if cage_sum > total or (self.cage_filled[cage] + 1 == len(cells) and cage_sum != total):
                 return False
-
-        # Check if the number exists in the same 3x3 subgrid
-        start_row = (row // 3) * 3
-        start_col = (col // 3) * 3
-        for i in range(start_row, start_row + 3):
-            for j in range(start_col, start_col + 3):
-                if self.grid[i][j] == num:
-                    return False
-
         return True
     
     def get_possible_values(self, row, col):
@@ -45,20 +222,58 @@ class SudokuPuzzle:
                 possible_values.append(value)
         return possible_values
     
+    def solution_value(self, row, col):
+        # The number the solution has in this cell, or None while the solution is unknown
+        if self.solution is None:
+            return None
+        return self.solution[row * 9 + col]
+
+    def matches_solution(self):
+        # Whether every filled cell holds the known solution's number
+        solution = self.solution
+        if solution is None:
+            return False
+        for row in range(9):
+            for col, value in enumerate(self.grid[row]):
+                if value and solution[row * 9 + col] != value:
+                    return False
+        return True
+
+    def is_correct(self, row, col):
+        # Whether the cell's number belongs to a solution of the givens. Hard puzzles can have
+        # several solutions, so a number other than the known solution's is checked by
+        # searching the givens with that number added. Without a known solution a filled
+        # cell counts as correct unless it conflicts with another cell.
+        value = self.grid[row][col]
+        if value == 0:
+            return False
+        if self.solution is None:
+            return (row, col) not in self.conflicts
+        if self.solution[row * 9 + col] == value:
+            return True
+        grid = [givens[:] for givens in self.initial_puzzle]
+        grid[row][col] = value
+        return find_solution(grid, self.rules) is not None
+
+    def solve_in_background(self):
+        # Find the solution of the givens in a daemon thread for puzzles that were not
+        # generated here. Returns the thread; solution stays None if there is none.
+        givens = [row[:] for row in self.initial_puzzle]
+
+        def solve():
+            self.solution = find_solution(givens, self.rules)
+
+        thread = threading.Thread(target=solve, name="puzzle-solution", daemon=True)
+        thread.start()
+        return thread
+
     def is_initial_value(self, row, col):
         return self.initial_puzzle[row][col] != 0
     
     def is_solved(self):
-        # Check rows, columns, and subgrids
-        for i in range(9):
-            if not self.is_unit_valid(self.grid[i]):  # Check row
-                return False
-            # Check column
-            if not self.is_unit_valid([self.grid[j][i] for j in range(9)]):
-                return False
-            if not self.is_unit_valid(self.get_subgrid(i // 3, i % 3)):  # Check subgrid
-                return False
-        return True
+        # A full grid with no conflicts contains 1 to 9 exactly once in every row, column and
+        # subgrid, never repeats a digit in a variant unit and meets every cage total
+        return self.filled_count == 81 and not self.conflicts
 
     def is_unit_valid(self, unit):
         # Check if a row, column, or subgrid is valid (contains numbers 1 to 9 exactly once)
@@ -69,33 +284,8 @@ class SudokuPuzzle:
         return [self.grid[3 * row + i][3 * col + j] for i in range(3) for j in range(3)]
     
     def is_valid(self):
-        # Check rows and columns for duplicates
-        for i in range(9):
-            row_values = set()
-            col_values = set()
-            for j in range(9):
-                row_val = self.get_value(i, j)
-                col_val = self.get_value(j, i)
-                if row_val in row_values or col_val in col_values:
-                    return False
-                if row_val != 0:
-                    row_values.add(row_val)
-                if col_val != 0:
-                    col_values.add(col_val)
-
-        # Check 3x3 subgrids for duplicates
-        for i in range(0, 9, 3):
-            for j in range(0, 9, 3):
-                subgrid_values = set()
-                for x in range(i, i + 3):
-                    for y in range(j, j + 3):
-                        val = self.get_value(x, y)
-                        if val in subgrid_values:
-                            return False
-                        if val != 0:
-                            subgrid_values.add(val)
-
-        return True
+        # Valid when no unit contains a duplicate number and no cage is over its total
+        return not self.conflicts
 
     def solve_sudoku(self):
         # Find the next empty cell
@@ -139,25 +329,102 @@ class SudokuPuzzle:
             backup = self.get_value(row, col)
             self.set_value(row, col, 0)
   
-def generate_sudoku(difficulty):
+def generate_sudoku(difficulty, rules=CLASSIC):
     grid = [[0 for _ in range(9)] for _ in range(9)]
 
     # Instantiate SudokuPuzzle class object with generated grid.
-    puzzle = SudokuPuzzle(grid)
+    puzzle = SudokuPuzzle(grid, rules)
 
     fill_grid(puzzle)
+    puzzle.solution = bytes(value for row in puzzle.grid for value in row)
 
     puzzle.remove_numbers(difficulty)
 
     puzzle.initial_puzzle = [row[:] for row in puzzle.grid]
+    puzzle.difficulty = difficulty
 
     return puzzle
 
+def count_solutions(puzzle, limit=2):
+    # Count the puzzle's solutions, stopping once limit is reached. Branches on the empty
+    # cell with the fewest possible values and restores the grid before returning.
+    best_cell, best_values = None, None
+    for row in range(9):
+        for col in range(9):
+            if puzzle.get_value(row, col) == 0:
+                values = puzzle.get_possible_values(row, col)
+                if not values:
+                    return 0
+                if best_values is None or len(values) < len(best_values):
+                    best_cell, best_values = (row, col), values
+
+    if best_cell is None:
+        return 1 if puzzle.is_solved() else 0
+
+    count = 0
+    for value in best_values:
+        puzzle.set_value(best_cell[0], best_cell[1], value)
+        count += count_solutions(puzzle, limit - count)
+        puzzle.set_value(best_cell[0], best_cell[1], 0)
+        if count >= limit:
+            break
+    return count
+
+def generate_clue_sweep():
+    # Puzzles sharing one solution with every number of givens from 81 down to the smallest
+    # count reached by blanking cells in random order while the solution stays unique.
+    # Returns a dict mapping the number of givens to the puzzle.
+    puzzle = SudokuPuzzle([[0 for _ in range(9)] for _ in range(9)])
+    fill_grid(puzzle)
+    puzzle.solution = bytes(value for row in puzzle.grid for value in row)
+
+    def snapshot():
+        snapshot_puzzle = puzzle.copy()
+        snapshot_puzzle.difficulty = f"{puzzle.filled_count} clues"
+        return snapshot_puzzle
+
+    puzzles = {81: snapshot()}
+    cells = [(row, col) for row in range(9) for col in range(9)]
+    random.shuffle(cells)
+    for row, col in cells:
+        backup = puzzle.get_value(row, col)
+        puzzle.set_value(row, col, 0)
+        if count_solutions(puzzle) != 1:
+            puzzle.set_value(row, col, backup)
+        else:
+            puzzles[puzzle.filled_count] = snapshot()
+    return puzzles
+
 def fill_grid(puzzle):
+    if puzzle.rules is not CLASSIC:
+        # Row-by-row filling rarely completes once variant units are added
+        fill_most_constrained(puzzle)
+        return
     numbers = list(range(1, 10))
     random.shuffle(numbers)
     fill(puzzle, numbers)
 
+def fill_most_constrained(puzzle):
+    # Fill the empty cell with the fewest possible values first, trying them in random order
+    best_cell, best_values = None, None
+    for row in range(9):
+        for col in range(9):
+            if puzzle.get_value(row, col) == 0:
+                values = puzzle.get_possible_values(row, col)
+                if best_values is None or len(values) < len(best_values):
+                    best_cell, best_values = (row, col), values
+    if best_cell is None:
+        return True
+
+    row, col = best_cell
+    random.shuffle(best_values)
+    for value in best_values:
+        puzzle.set_value(row, col, value)
+        if fill_most_constrained(puzzle):
+            return True
+    puzzle.set_value(row, col, 0)
+    return False
+
 def fill(puzzle, numbers):
     for row in range(9):
         for col in range(9):
@@ -179,7 +446,28 @@ def find_empty_cell(grid):
                 return row, col
     return -1, -1
 
+def find_solution(grid, rules=CLASSIC):
+    # A solution of the grid as 81 bytes in row-major order, or None if it has none
+    from search_core import make_search_core, FEWEST_CANDIDATES
+    solution = make_search_core(grid, FEWEST_CANDIDATES, rules).solve()
+    return bytes(solution) if solution is not None else None
+
 def get_hint(puzzle):
+    # With a known solution the hint is the solution's number for the first empty cell where
+    # it is still valid. Hard puzzles can have several solutions, so when the entries so far
+    # differ from the known one, a solution they lead to is searched for and kept instead.
+    # Entries that lead to no solution are mistakes and leave the known solution in place.
+    if puzzle.solution is not None:
+        if not puzzle.matches_solution() and puzzle.is_valid():
+            solution = find_solution(puzzle.grid, puzzle.rules)
+            if solution is not None:
+                puzzle.solution = solution
+        for row in range(9):
+            for col in range(9):
+                value = puzzle.solution[row * 9 + col]
+                if puzzle.grid[row][col] == 0 and puzzle.is_valid_number(row, col, value):
+                    return row, col, value
+
     # Get a list of all empty cells
     empty_cells = [(row, col) for row in range(9)
                    for col in range(9) if puzzle.get_value(row, col) == 0]
@@ -229,18 +517,11 @@ def count_conflicts(grid, row, col):
     conflicts = 0
     num = grid.get_value(row, col)
 
-    # Count conflicts in the row and column
-    for i in range(9):
-        if grid.get_value(row, i) == num:
-            conflicts += 1
-        if grid.get_value(i, col) == num:
-            conflicts += 1
-
-    # Count conflicts in the 3x3 subgrid
-    start_row, start_col = (row // 3) * 3, (col // 3) * 3
-    for i in range(start_row, start_row + 3):
-        for j in range(start_col, start_col + 3):
-            if grid.get_value(i, j) == num:
+    # Count the cells holding the same number in each of the cell's units (row, column,
+    # 3x3 subgrid and any variant units)
+    for unit in grid.rules.cell_units[row][col]:
+        for unit_row, unit_col in grid.rules.units[unit]:
+            if grid.get_value(unit_row, unit_col) == num:
                 conflicts += 1
 
     return conflicts
\ No newline at end of file
@@ -0,0 +1,72 @@
+import os
+import time
+import pickle
+import argparse
+import functools
+from concurrent.futures import ProcessPoolExecutor
+
+from sudoku_generator import generate_sudoku
+from solving_algorithms import backtracking
+from shared_batch import SharedBatchPool, search_grid, puzzle_solver
+
+
+def passthrough(puzzle):
+    # Returns the puzzle unsolved, so only the cost of moving it between processes is timed
+    return puzzle
+
+
+def passthrough_grid(grid, rules):
+    return [value for row in grid for value in row]
+
+
+def solve_pickled(solver, puzzle):
+    solved = solver(puzzle)
+    return None if solved is None else solved.grid
+
+
+def time_pickled(solver, puzzles, workers, chunk_size):
+    # Baseline: every puzzle object is pickled to a worker and every result pickled back
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(abs, range(workers)))  # Start the workers before timing
+        start_time = time.perf_counter()
+        list(executor.map(functools.partial(solve_pickled, solver), puzzles, chunksize=chunk_size))
+        return time.perf_counter() - start_time
+
+
+def time_shared(solver, puzzles, workers, chunk_size):
+    with SharedBatchPool(solver, workers, capacity=len(puzzles), chunk_size=chunk_size) as pool:
+        start_time = time.perf_counter()
+        pool.solve_batch(puzzles)
+        return time.perf_counter() - start_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput of pickled versus shared memory puzzle batches")
+    parser.add_argument("--puzzles", type=int, default=2000, help="puzzles per batch")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=32, help="puzzles per job sent to a worker")
+    parser.add_argument("--difficulty", default="Easy", choices=["Easy", "Medium", "Hard"])
+    args = parser.parse_args()
+    workers = args.workers or os.cpu_count() or 1
+
+    base = [generate_sudoku(args.difficulty) for _ in range(min(args.puzzles, 50))]
+    puzzles = [base[i % len(base)] for i in range(args.puzzles)]
+
+    print(f"Puzzles per batch: {args.puzzles}, workers {workers}, chunk size {args.chunk_size}")
+    print(f"Pickled bytes per puzzle: {len(pickle.dumps(puzzles[0]))}, shared memory record: 81 bytes")
+    # The shared memory pool runs grid solvers; the last row wraps the puzzle solver instead,
+    # which rebuilds a SudokuPuzzle per record in the worker
+    scenarios = [
+        ("Transport only", passthrough, passthrough_grid),
+        ("Backtracking", backtracking, search_grid),
+        ("Backtracking (puzzle objects)", backtracking, puzzle_solver(backtracking)),
+    ]
+    for name, solver, grid_solver in scenarios:
+        pickled = time_pickled(solver, puzzles, workers, args.chunk_size)
+        shared = time_shared(grid_solver, puzzles, workers, args.chunk_size)
+        print(f"{name + ':':<31} pickled {args.puzzles / pickled:.0f} puzzles/s, "
+              f"shared {args.puzzles / shared:.0f} puzzles/s, speedup {pickled / shared:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
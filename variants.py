@@ -0,0 +1,97 @@
+from sudoku_generator import CLASSIC, Ruleset, register_ruleset
+
+# Knight moves between cells; two cells a knight's move apart may not hold the same digit
+KNIGHT_MOVES = [(-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1)]
+
+
+class Variant:
+    # A constraint plugin. A variant declares extra units (groups of cells that may not repeat
+    # a digit) and/or killer cages as (total, cells) pairs; compile_rules turns the variants of
+    # a puzzle into one Ruleset of lookup tables.
+    def __init__(self, name, units=(), cages=()):
+        self.name = name
+        self.units = [list(unit) for unit in units]
+        self.cages = [(total, list(cells)) for total, cells in cages]
+
+    def __repr__(self):
+        return f"Variant({self.name!r})"
+
+
+def diagonal_units():
+    return [[(i, i) for i in range(9)], [(i, 8 - i) for i in range(9)]]
+
+
+def windoku_units():
+    # The four shaded 3x3 windows starting at rows and columns 1 and 5
+    return [[(top + i, left + j) for i in range(3) for j in range(3)] for top in (1, 5) for left in (1, 5)]
+
+
+def anti_knight_units():
+    # Every pair of cells a knight's move apart, listed once
+    pairs = []
+    for row in range(9):
+        for col in range(9):
+            for row_step, col_step in KNIGHT_MOVES:
+                other_row, other_col = row + row_step, col + col_step
+                if 0 <= other_row < 9 and 0 <= other_col < 9 and (row, col) < (other_row, other_col):
+                    pairs.append([(row, col), (other_row, other_col)])
+    return pairs
+
+
+DIAGONAL = Variant("Diagonal", units=diagonal_units())
+WINDOKU = Variant("Windoku", units=windoku_units())
+ANTI_KNIGHT = Variant("Anti-knight", units=anti_knight_units())
+
+# Variants that need no per-puzzle data, by command line name
+VARIANTS = {
+    "diagonal": DIAGONAL,
+    "windoku": WINDOKU,
+    "anti-knight": ANTI_KNIGHT,
+}
+
+
+def killer(cages):
+    # Killer cages as (total, [(row, col), ...]) pairs; the cells of a cage may not repeat a digit
+    caged = set()
+    for total, cells in cages:
+        cells = [tuple(cell) for cell in cells]
+        if caged & set(cells) or len(set(cells)) != len(cells):
+            raise ValueError(f"Cage {cells} overlaps another cage")
+        caged.update(cells)
+        if not 1 <= len(cells) <= 9:
+            raise ValueError(f"A cage must have 1 to 9 cells, got {len(cells)}")
+        if not cage_total_possible(total, len(cells)):
+            raise ValueError(f"No {len(cells)} distinct digits add up to {total}")
+    return Variant("Killer", cages=cages)
+
+
+def cage_total_possible(total, size):
+    return sum(range(1, size + 1)) <= total <= sum(range(10 - size, 10))
+
+
+# Compiled rulesets of variant combinations without cages, so each is built only once
+compiled_rules = {}
+
+
+def compile_rules(*variants):
+    # One Ruleset with the classic units plus the units and cages of every variant
+    if not variants:
+        return CLASSIC
+    key = tuple(variant.name for variant in variants)
+    cacheable = not any(variant.cages for variant in variants)
+    if cacheable and key in compiled_rules:
+        return compiled_rules[key]
+    rules = Ruleset(" + ".join(key),
+                    [unit for variant in variants for unit in variant.units],
+                    [cage for variant in variants for cage in variant.cages])
+    if cacheable:
+        compiled_rules[key] = register_ruleset(rules)
+    return rules
+
+
+def rules_by_name(names, cages=None):
+    # Ruleset for variant names such as ["diagonal", "windoku"], plus killer cages if given
+    variants = [VARIANTS[name] for name in names]
+    if cages:
+        variants.append(killer(cages))
+    return compile_rules(*variants)